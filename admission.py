@@ -0,0 +1,214 @@
+# admission.py
+"""
+Admission control for upstream LLM calls.
+
+At most LLM_MAX_CONCURRENCY generations run at once across all workers.
+Up to LLM_QUEUE_MAX more may wait (for at most LLM_QUEUE_WAIT_SECS) for a
+free slot; anything beyond that is turned away straight away with
+Rejected, which the routes map to 429/503 + Retry-After. Keeping the limit
+below the number of web workers leaves workers free for schedule pages
+during an AI burst.
+
+Slots are rows in a small SQLite table so the limit holds across uWSGI
+worker processes without threads.
+"""
+import os
+import time
+import sqlite3
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+
+import db_cache
+
+# ------------ Configuration ------------
+SLOTS_DB_PATH = os.path.join(db_cache.DATA_DIR, "llm_slots.db")
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+QUEUE_MAX = int(os.getenv("LLM_QUEUE_MAX", "4"))
+QUEUE_WAIT_SECS = float(os.getenv("LLM_QUEUE_WAIT_SECS", "5"))
+
+# Seconds suggested to rejected clients
+RETRY_AFTER_SECS = int(os.getenv("LLM_RETRY_AFTER_SECS", "10"))
+
+# A running slot older than this is considered leaked (worker died)
+SLOT_TTL_SECS = int(os.getenv("LLM_SLOT_TTL_SECS", "300"))
+
+POLL_SECS = 0.1
+
+RUNNING, WAITING = "running", "waiting"
+
+# Per-worker counters (see /admin/ai-cache)
+STATS = {
+    "admitted": 0,
+    "queued": 0,
+    "rejected_queue_full": 0,
+    "rejected_timeout": 0,
+    "wait_ms_total": 0.0,
+    "wait_ms_max": 0.0,
+}
+
+
+class Rejected(Exception):
+    """No LLM slot available; status is 429 (queue full) or 503 (wait timed out)."""
+
+    def __init__(self, message: str, status: int, retry_after: int = RETRY_AFTER_SECS):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ------------ Database Setup ------------
+@contextmanager
+def get_connection():
+    conn = None
+    try:
+        conn = sqlite3.connect(SLOTS_DB_PATH, timeout=10)
+        conn.isolation_level = None
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def init_db():
+    with get_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_slots (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                state TEXT NOT NULL,
+                owner_pid INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+
+
+@contextmanager
+def _immediate(conn):
+    """Write transaction taken up front, so slot counting is race-free."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _counts(conn, now: float) -> Dict[str, int]:
+    # Drop slots left behind by dead workers and waiters that gave up
+    conn.execute(
+        "DELETE FROM llm_slots WHERE state = ? AND created_at < ?",
+        (RUNNING, now - SLOT_TTL_SECS),
+    )
+    conn.execute(
+        "DELETE FROM llm_slots WHERE state = ? AND created_at < ?",
+        (WAITING, now - QUEUE_WAIT_SECS - 30),
+    )
+    rows = conn.execute("SELECT state, COUNT(*) FROM llm_slots GROUP BY state").fetchall()
+    counts = {RUNNING: 0, WAITING: 0}
+    counts.update(dict(rows))
+    return counts
+
+
+# ------------ Core Logic ------------
+def _record_wait(started: float) -> None:
+    waited = (time.monotonic() - started) * 1000
+    STATS["wait_ms_total"] += waited
+    STATS["wait_ms_max"] = max(STATS["wait_ms_max"], round(waited, 2))
+
+
+def acquire() -> int:
+    """
+    Take a slot and return its id, waiting briefly in the queue if needed.
+    Raises Rejected when the queue is full or the wait times out.
+    """
+    init_db()
+    started = time.monotonic()
+    pid = os.getpid()
+    with get_connection() as conn:
+        with _immediate(conn):
+            now = time.time()
+            counts = _counts(conn, now)
+            if counts[RUNNING] < MAX_CONCURRENCY and counts[WAITING] == 0:
+                slot_id = conn.execute(
+                    "INSERT INTO llm_slots (state, owner_pid, created_at) VALUES (?, ?, ?)",
+                    (RUNNING, pid, now),
+                ).lastrowid
+                STATS["admitted"] += 1
+                return slot_id
+            if counts[WAITING] >= QUEUE_MAX:
+                STATS["rejected_queue_full"] += 1
+                raise Rejected("AI service is busy, please retry shortly", 429)
+            slot_id = conn.execute(
+                "INSERT INTO llm_slots (state, owner_pid, created_at) VALUES (?, ?, ?)",
+                (WAITING, pid, now),
+            ).lastrowid
+        STATS["queued"] += 1
+
+        deadline = started + QUEUE_WAIT_SECS
+        while time.monotonic() < deadline:
+            time.sleep(POLL_SECS)
+            with _immediate(conn):
+                now = time.time()
+                counts = _counts(conn, now)
+                oldest = conn.execute(
+                    "SELECT MIN(id) FROM llm_slots WHERE state = ?", (WAITING,)
+                ).fetchone()[0]
+                # First come, first served
+                if counts[RUNNING] < MAX_CONCURRENCY and oldest == slot_id:
+                    conn.execute(
+                        "UPDATE llm_slots SET state = ?, created_at = ? WHERE id = ?",
+                        (RUNNING, now, slot_id),
+                    )
+                    STATS["admitted"] += 1
+                    _record_wait(started)
+                    return slot_id
+
+        conn.execute("DELETE FROM llm_slots WHERE id = ?", (slot_id,))
+    STATS["rejected_timeout"] += 1
+    _record_wait(started)
+    raise Rejected("AI service is overloaded, please retry shortly", 503)
+
+
+def release(slot_id: Optional[int]) -> None:
+    if slot_id is None:
+        return
+    try:
+        with get_connection() as conn:
+            conn.execute("DELETE FROM llm_slots WHERE id = ?", (slot_id,))
+    except sqlite3.Error as e:
+        print(f"Error releasing LLM slot: {e}")
+
+
+@contextmanager
+def slot():
+    """
+    with admission.slot(): ... runs the body holding one LLM slot. Wrap
+    each upstream call, not a whole request (a slot stands for one call in
+    flight), and never take a slot while already holding one: a holder
+    waiting on calls that need slots can starve itself.
+    """
+    slot_id = acquire()
+    try:
+        yield slot_id
+    finally:
+        release(slot_id)
+
+
+def get_stats() -> Dict[str, Any]:
+    """Live slot usage (all workers) plus this worker's counters."""
+    out: Dict[str, Any] = dict(STATS)
+    out["wait_ms_avg"] = round(STATS["wait_ms_total"] / (STATS["queued"] or 1), 2)
+    out["wait_ms_total"] = round(STATS["wait_ms_total"], 2)
+    out["max_concurrency"] = MAX_CONCURRENCY
+    out["queue_max"] = QUEUE_MAX
+    try:
+        init_db()
+        with get_connection() as conn:
+            with _immediate(conn):
+                counts = _counts(conn, time.time())
+        out["running"] = counts[RUNNING]
+        out["queue_depth"] = counts[WAITING]
+    except sqlite3.Error:
+        out["running"] = out["queue_depth"] = None
+    return out
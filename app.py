@@ -1,36 +1,187 @@
-from flask import Flask, jsonify, request, render_template, send_from_directory, make_response, url_for
-from flask_cors import CORS
-from dotenv import load_dotenv
-import os
-import pytz
-from datetime import date, timedelta, datetime
+# ---------- STARTUP TIMING ----------
+# Every uWSGI worker spawn imports this module, so keep import cheap and
+# record where the time goes. See /admin/startup for the report.
+import time
+from contextlib import contextmanager
 
-# external deps you already use
-import requests
-import google.generativeai as genai
-from youtube_transcript_api import YouTubeTranscriptApi
+_IMPORT_T0 = time.perf_counter()
+STARTUP_PHASES = []  # [(phase, ms)]; lazy phases are appended on first use
 
-# your module
-import db_cache
+
+@contextmanager
+def _startup_phase(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        STARTUP_PHASES.append((name, round((time.perf_counter() - t0) * 1000, 2)))
+
+
+with _startup_phase("import: flask"):
+    from flask import Flask, Response, g, jsonify, stream_with_context, request, render_template, send_from_directory, make_response, url_for
+    from flask_cors import CORS
+    from dotenv import load_dotenv
+
+with _startup_phase("import: stdlib + pytz"):
+    import os
+    import json
+    import pytz
+    from datetime import date, timedelta, datetime
+
+# google.generativeai and youtube_transcript_api are imported lazily on the
+# first /api/ask (see providers.py)
+
+# .env first: the app modules read their settings at import
+with _startup_phase("dotenv"):
+    load_dotenv()
+
+# your modules
+with _startup_phase("import: app modules"):
+    import db_cache
+    import db_profiler
+    import compression
+    import columnar
+    import schedule_index
+    import timing
+    import metrics
+    import llm_cache
+    import singleflight
+    import admission
+    import transcript_cache
+    import ask_service
+    import ask_jobs
 
 # IMPORTANT: do NOT import/start APScheduler at module import time
 # (PythonAnywhere uWSGI has threads disabled)
 
-load_dotenv()
+# LAZY_INIT=1 (default): no AI client imports and no DB/network work at import;
+# the cache is warmed on the first request instead.
+# LAZY_INIT=0: old behaviour, everything is initialised while importing.
+LAZY_INIT = os.getenv("LAZY_INIT", "1") != "0"
 
-app = Flask(__name__, static_folder="static", template_folder="templates")
-CORS(app, origins=["https://karanjadhav.tech"])
+with _startup_phase("flask app"):
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+    CORS(app, origins=["https://karanjadhav.tech"])
 
 Schedule_data_script_url = os.getenv('web_app')
 
-# ---------- INITIAL (SYNC) WARMUP, OPTIONAL ----------
-# This is safe because it's synchronous and wrapped in try/except.
-try:
-    cache = db_cache.get_cached_tables()
-    if not cache.get("Monthly") and not cache.get("daily_OCT"):
-        db_cache.refresh_cache(Schedule_data_script_url)
-except Exception as e:
-    app.logger.warning(f"Initial cache refresh failed: {e}")
+# ---------- REQUEST TIMING ----------
+# Every response carries a Server-Timing header with the named phases
+# (timing.phase) that ran for it; see the Network tab in devtools.
+# Requests slower than SLOW_REQUEST_MS are also logged as one JSON line.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "1") != "0"
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "1000"))
+
+
+@app.before_request
+def _start_timing():
+    g.request_t0 = time.perf_counter()
+    timing.start()
+
+
+@app.after_request
+def _emit_timing(response):
+    t0 = g.pop("request_t0", None)
+    if t0 is None:
+        return response
+    total_ms = (time.perf_counter() - t0) * 1000
+    phases = timing.summarize(timing.stop())
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timing.server_timing(phases, total_ms)
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.inc("app_requests_total", route=route, method=request.method, status=response.status_code)
+    metrics.observe("app_request_duration_seconds", total_ms / 1000, route=route)
+    metrics.maybe_flush()
+    if total_ms >= SLOW_REQUEST_MS:
+        # Streamed bodies are still being sent; this covers time to headers
+        app.logger.warning("slow_request %s", json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "query": request.query_string.decode("utf-8", "replace"),
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "phases": phases,
+            "pid": os.getpid(),
+        }))
+    return response
+
+
+# Templates inline tables as {{ items|columnar|tojson }} (see columnar.py)
+app.add_template_filter(columnar.encode, "columnar")
+
+# ---------- CACHE WARMUP ----------
+_warmed_up = False
+
+
+def _warmup():
+    """One sync refresh if the database has never been filled."""
+    try:
+        if not db_cache.has_cached_data():
+            db_cache.refresh_cache(Schedule_data_script_url, source="warmup")
+    except Exception as e:
+        app.logger.warning(f"Initial cache refresh failed: {e}")
+
+
+@app.before_request
+def _warmup_on_first_request():
+    global _warmed_up
+    if _warmed_up or request.endpoint in ("static", "sw", "manifest"):
+        return
+    _warmed_up = True
+    with _startup_phase("lazy: cache warmup (first request)"), timing.phase("warmup"):
+        _warmup()
+
+
+if not LAZY_INIT:
+    _warmed_up = True
+    with _startup_phase("cache warmup"):
+        _warmup()
+
+# ---------- RESPONSE CACHE ----------
+# Rendered HTML / JSON bodies (and their gzip/brotli variants) per worker,
+# keyed by route + args and invalidated when the data version changes.
+_response_cache = compression.ResponseCache()
+
+# /schedule.json pages get their own small LRU so cursor walks can't push
+# the /schedule and /daily pages out of _response_cache
+SCHEDULE_JSON_PAGE_CACHE_ENTRIES = 16
+_page_cache = compression.ResponseCache(SCHEDULE_JSON_PAGE_CACHE_ENTRIES)
+
+
+def _cached_response(key, build, mimetype="text/html", cache=_response_cache):
+    """
+    Serve body for key from the per-worker cache, building it with build()
+    on a miss. Compresses once per data version when the client allows it,
+    and answers If-None-Match revalidation with 304.
+    """
+    version = db_cache.get_data_version()
+    body = cache.get(key, version)
+    metrics.inc("app_cache_lookups_total", cache="response", result="miss" if body is None else "hit")
+    if body is None:
+        body = build()
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        cache.put(key, version, body)
+
+    encoding = None
+    if compression.is_compressible(mimetype, len(body)):
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+
+    # Each encoding is a distinct representation, so it gets its own tag
+    etag = cache.etag(key) + (f"-{encoding}" if encoding else "")
+    if etag in request.if_none_match:
+        response = make_response("", 304)
+    else:
+        with timing.phase("compress"):
+            body = cache.encoded(key, encoding)
+        response = make_response(body)
+        response.mimetype = mimetype
+    response.set_etag(etag)
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
+
 
 # ---------- ROUTES ----------
 @app.route("/schedule")
@@ -38,23 +189,26 @@ def home():
     """
     Prefer cached database. If empty (first boot), try one sync refresh.
     """
-    data = db_cache.get_cached_tables()
-
-    if not data.get("Monthly") and not data.get("daily_OCT"):
+    if not db_cache.has_cached_data():
         try:
-            db_cache.refresh_cache(Schedule_data_script_url)
-            data = db_cache.get_cached_tables()
+            db_cache.refresh_cache(Schedule_data_script_url, source="first_boot")
         except Exception as e:
             app.logger.error(f"Live refresh failed: {e}")
 
-    return render_template(
-        "monthly_schedule.html",
-        items=data.get("Monthly", []),
-    )
+    return _cached_response(("schedule",), _render_monthly)
 
-@app.route("/daily")
-@app.route("/daily")
-def daily():
+
+def _render_monthly():
+    items = schedule_index.monthly_items()
+    with timing.phase("render"):
+        return render_template(
+            "monthly_schedule.html",
+            items=items,
+        )
+
+
+def _view_dates():
+    """Return (view_date iso string, today in IST) from ?d=yyyy-mm-dd."""
     ist = pytz.timezone("Asia/Kolkata")
     today_ist = datetime.now(ist).date()
 
@@ -63,105 +217,209 @@ def daily():
         view_date = (datetime.strptime(d, "%Y-%m-%d").date() if d else today_ist).isoformat()
     except Exception:
         view_date = today_ist.isoformat()
+    return view_date, today_ist
 
-    tables = db_cache.get_cached_tables()
-    daily_rows = tables.get("daily_OCT", [])
-    monthly_rows = tables.get("Monthly", [])
 
-    # If either is empty, still render gracefully
-    if not daily_rows or not monthly_rows:
-        vd = date.fromisoformat(view_date)
-        prev_url = url_for("daily", d=(vd - timedelta(days=1)).isoformat())
-        next_url = url_for("daily", d=(vd + timedelta(days=1)).isoformat())
-        today_url = url_for("daily", d=today_ist.isoformat())
+@app.route("/daily")
+def daily():
+    view_date, today_ist = _view_dates()
+    return _cached_response(
+        ("daily", view_date, today_ist.isoformat()),
+        lambda: _render_daily(view_date, today_ist),
+    )
+
+
+def _render_daily(view_date, today_ist):
+    # Navigation URLs
+    vd = date.fromisoformat(view_date)
+    prev_url = url_for("daily", d=(vd - timedelta(days=1)).isoformat())
+    next_url = url_for("daily", d=(vd + timedelta(days=1)).isoformat())
+    today_url = url_for("daily", d=today_ist.isoformat())
+
+    items = _daily_items(view_date)
+    with timing.phase("render"):
         return render_template(
             "daily_schedule.html",
-            items=daily_rows,
+            items=items,
             view_date=view_date,
+            today=today_ist.isoformat(),
             prev_url=prev_url,
             next_url=next_url,
             today_url=today_url,
             back_to_month_url=url_for("home")
         )
 
-    # Split header/data
-    daily_header, daily_data = daily_rows[0], daily_rows[1:]
-    monthly_header, monthly_data = monthly_rows[0], monthly_rows[1:]
 
-    # Build monthly lookup {id -> to_do}
-    try:
-        m_idx_id = monthly_header.index("id")
-        m_idx_todo = monthly_header.index("to_do")
-    except ValueError:
-        # Fallback if headers missing
-        m_idx_id = None
-        m_idx_todo = None
-
-    monthly_lookup = {}
-    if m_idx_id is not None and m_idx_todo is not None:
-        for r in monthly_data:
-            if m_idx_id < len(r) and m_idx_todo < len(r):
-                monthly_lookup[r[m_idx_id]] = r[m_idx_todo]
-
-    # Prepare new daily table:
-    # 1) Replace "monthly_task_id" with the "to_do" string
-    # 2) (Optionally) filter rows by selected date
-    try:
-        d_idx_mtid = daily_header.index("monthly_task_id")
-    except ValueError:
-        d_idx_mtid = None
+# Compact one-day payload for in-place date navigation from daily.js.
+# Responses carry an ETag, so re-fetching an unchanged day costs a 304.
+@app.route("/api/daily")
+def api_daily():
+    view_date, today_ist = _view_dates()
+    vd = date.fromisoformat(view_date)
+    return _cached_response(
+        ("api/daily", view_date, today_ist.isoformat()),
+        lambda: app.json.dumps({
+            "date": view_date,
+            "prev": (vd - timedelta(days=1)).isoformat(),
+            "next": (vd + timedelta(days=1)).isoformat(),
+            "today": today_ist.isoformat(),
+            "items": _daily_items(view_date),
+        }),
+        mimetype="application/json",
+    )
 
-    try:
-        d_idx_date = daily_header.index("Date")
-    except ValueError:
-        d_idx_date = None
 
-    # New header: swap "monthly_task_id" -> "monthly_task"
-    if d_idx_mtid is not None:
-        new_header = daily_header[:d_idx_mtid] + ["monthly_task"] + daily_header[d_idx_mtid+1:]
-    else:
-        new_header = daily_header[:]  # unchanged
-
-    daily_with_names = [new_header]
+def _daily_items(view_date):
+    """
+    Columnar daily table for view_date, with monthly_task_id replaced by
+    the monthly to_do text (see schedule_index.py).
+    """
+    with timing.phase("day_lookup"):
+        return schedule_index.daily_items(view_date)
 
-    for row in daily_data:
-        # Filter by date (only if Date column exists)
-        if d_idx_date is not None and d_idx_date < len(row):
-            if (row[d_idx_date] or "")[:10] != view_date:
-                continue
 
-        new_row = list(row)
+# Raw JSON export.
+# Query params (all optional):
+#   tables=Monthly,daily_OCT   which tables to include (default: both)
+#   fields=id,to_do            column projection (header row is projected too)
+#   from=yyyy-mm-dd, to=...    inclusive Date range for daily rows
+#   month=oct_2025             Monthly month_year / daily Date month
+#   limit=N, cursor=...        cursor pagination; response adds "next_cursor"
+# Without limit/cursor the full dump is streamed row by row.
+SCHEDULE_JSON_MAX_LIMIT = 1000
+STREAM_CHUNK_BYTES = 64 * 1024
 
-        # Replace monthly_task_id with to_do
-        if d_idx_mtid is not None and d_idx_mtid < len(new_row):
-            mtid = new_row[d_idx_mtid]
-            todo = monthly_lookup.get(mtid, f"[Missing task {mtid}]")
-            new_row = new_row[:d_idx_mtid] + [todo] + new_row[d_idx_mtid+1:]
 
-        daily_with_names.append(new_row)
+@app.route("/schedule.json")
+def schedule_json():
+    args = request.args
+    tables = [t for t in (args.get("tables") or ",".join(db_cache.TABLES)).split(",") if t]
+    unknown = [t for t in tables if t not in db_cache.TABLES]
+    if unknown:
+        return jsonify({"error": f"Unknown table(s): {', '.join(unknown)}"}), 400
+
+    fields = [f for f in (args.get("fields") or "").split(",") if f] or None
+    filters = {
+        "date_from": args.get("from"),
+        "date_to": args.get("to"),
+        "month_year": args.get("month"),
+    }
 
-    # Navigation URLs
-    vd = date.fromisoformat(view_date)
-    prev_url = url_for("daily", d=(vd - timedelta(days=1)).isoformat())
-    next_url = url_for("daily", d=(vd + timedelta(days=1)).isoformat())
-    today_url = url_for("daily", d=today_ist.isoformat())
+    limit = args.get("limit")
+    cursor = args.get("cursor")
+    if limit is None and cursor is None:
+        return _stream_schedule_json(tables, fields, filters)
 
-    return render_template(
-        "daily_schedule.html",
-        items=daily_with_names,
-        view_date=view_date,
-        prev_url=prev_url,
-        next_url=next_url,
-        today_url=today_url,
-        back_to_month_url=url_for("home")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+    limit = min(limit or SCHEDULE_JSON_MAX_LIMIT, SCHEDULE_JSON_MAX_LIMIT)
+    start_table, after_id = tables[0], 0
+    if cursor:
+        start_table, _, after = cursor.partition(":")
+        if start_table not in tables or not after.isdigit():
+            return jsonify({"error": "Invalid cursor"}), 400
+        after_id = int(after)
+
+    return _cached_response(
+        ("schedule.json", request.query_string),
+        lambda: app.json.dumps(
+            _schedule_json_page(tables, fields, filters, limit, start_table, after_id)
+        ),
+        mimetype="application/json",
+        cache=_page_cache,
     )
 
 
+def _projector(header, fields):
+    """Return a function that keeps only the requested columns of a row."""
+    if not fields:
+        return lambda row: row
+    idxs = [header.index(f) for f in fields if f in header]
+    return lambda row: [row[i] if i < len(row) else None for i in idxs]
 
-# Optional raw JSON for debugging
-@app.route("/schedule.json")
-def schedule_json():
-    return db_cache.get_cached_tables()
+
+def _schedule_json_page(tables, fields, filters, limit, start_table, after_id):
+    completions = db_cache.get_completions()
+    page = {}
+    next_cursor = None
+    remaining = limit
+
+    for name in tables[tables.index(start_table):]:
+        rows_iter = db_cache.iter_table(
+            name, completions,
+            after_id=after_id if name == start_table else 0,
+            **filters,
+        )
+        rows = []
+        project = None
+        last_id = None
+        for row_id, row in rows_iter:
+            if project is None:
+                project = _projector(row, fields)
+                rows.append(project(row))
+                continue
+            if remaining == 0:
+                # More rows remain in this table: resume after the last one sent
+                next_cursor = f"{name}:{last_id}"
+                break
+            rows.append(project(row))
+            last_id = row_id
+            remaining -= 1
+        rows_iter.close()
+        page[name] = rows
+        if next_cursor:
+            break
+        if remaining == 0:
+            # Page is full exactly at a table boundary
+            following = tables[tables.index(name) + 1:]
+            if following:
+                next_cursor = f"{following[0]}:0"
+            break
+
+    page["next_cursor"] = next_cursor
+    return page
+
+
+def _iter_schedule_json(tables, fields, filters):
+    """Yield the full JSON document in ~STREAM_CHUNK_BYTES pieces."""
+    completions = db_cache.get_completions()
+    dumps = app.json.dumps
+    buf = ["{"]
+    size = 1
+    for t_idx, name in enumerate(tables):
+        buf.append(("," if t_idx else "") + dumps(name) + ":[")
+        project = None
+        for row_id, row in db_cache.iter_table(name, completions, **filters):
+            if project is None:
+                project = _projector(row, fields)
+                piece = dumps(project(row))
+            else:
+                piece = "," + dumps(project(row))
+            buf.append(piece)
+            size += len(piece)
+            if size >= STREAM_CHUNK_BYTES:
+                yield "".join(buf).encode("utf-8")
+                buf, size = [], 0
+        buf.append("]")
+    buf.append("}")
+    yield "".join(buf).encode("utf-8")
+
+
+def _stream_schedule_json(tables, fields, filters):
+    chunks = _iter_schedule_json(tables, fields, filters)
+    encoding = compression.negotiate(request.headers.get("Accept-Encoding", ""))
+    if encoding:
+        chunks = compression.stream(chunks, encoding)
+    response = Response(chunks, mimetype="application/json")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    return response
 
 @app.route("/")
 def index():
@@ -188,8 +446,13 @@ def inject_access_code():
     return {"access_code": os.getenv("APP_ACCESS_CODE", "1234")}
 
 # --------- GENAI ENDPOINTS ----------
-genai.configure(api_key=os.getenv("GEMINI_API"))
-model = genai.GenerativeModel("gemini-2.0-flash")
+# The ask pipeline itself lives in ask_service.py (shared with ask_worker.py)
+
+
+def _cache_bypass(data):
+    """Skip cached answers with {"cache": false} or Cache-Control: no-cache."""
+    return data.get("cache") is False or "no-cache" in request.headers.get("Cache-Control", "")
+
 
 @app.route("/api/ask", methods=["POST"])
 def ask():
@@ -197,25 +460,201 @@ def ask():
     mode = data.get("mode")
     prompt = data.get("prompt")
 
-    try:
-        if mode == "video":
-            video_id = (prompt or "").strip().split("v=")[-1].split("&")[0]
-            transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-            transcript = " ".join([t["text"] for t in transcript_list])
-            query = f"Make detailed notes from this YouTube video transcript: {transcript}"
-        elif mode == "notes":
-            query = f"Answer this using study notes: {prompt}"
-        elif mode == "general":
-            query = prompt
-        else:
-            return jsonify({"error": "Invalid mode"}), 400
+    if mode not in ask_service.ASK_MODES:
+        return jsonify({"error": "Invalid mode"}), 400
 
-        response = model.generate_content(query)
-        return jsonify({"response": response.text})
+    try:
+        text, cached = ask_service.answer(mode, prompt, bypass=_cache_bypass(data))
+        return jsonify({"response": text, "cached": cached})
 
+    except admission.Rejected as e:
+        return _rejected(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+def _rejected(e):
+    """429/503 with Retry-After for a request shed by admission control."""
+    metrics.inc("app_ask_rejected_total", status=e.status)
+    response = jsonify({"error": str(e), "retry_after": e.retry_after})
+    response.status_code = e.status
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+# Streaming variant of /api/ask as Server-Sent Events:
+#   event: chunk  data: {"text": "..."}   (repeated)
+#   event: done   data: {"cached": bool}
+#   event: error  data: {"error": "..."}
+# Accepts the same JSON body as /api/ask, or ?mode=&prompt= on GET so it
+# also works with EventSource. See static/js/ask.js for the client.
+@app.route("/api/ask/stream", methods=["GET", "POST"])
+def ask_stream():
+    data = (request.get_json(silent=True) or {}) if request.method == "POST" else request.args.to_dict()
+    if request.method == "GET" and data.get("cache") == "false":
+        data["cache"] = False
+    mode = data.get("mode")
+    prompt = data.get("prompt")
+
+    if mode not in ask_service.ASK_MODES:
+        return jsonify({"error": "Invalid mode"}), 400
+
+    bypass = _cache_bypass(data)
+    key, cached_text = llm_cache.lookup(
+        mode, ask_service.cache_prompt(mode, prompt), ask_service.model_name(),
+        bypass=bypass,
+    )
+
+    # Decide leader and take an LLM slot before the 200 is committed, so an
+    # overloaded server can still answer 429/503 (the slot is handed back
+    # while the query is built, see events())
+    leader = False
+    slot_id = None
+    if cached_text is None:
+        leader = bypass or singleflight.acquire(key)
+        if leader:
+            try:
+                slot_id = admission.acquire()
+            except admission.Rejected as e:
+                if not bypass:
+                    singleflight.release(key)
+                return _rejected(e)
+
+    released = False
+
+    def release():
+        nonlocal released
+        if released:
+            return
+        released = True
+        admission.release(slot_id)
+        if leader and not bypass:
+            singleflight.release(key)
+        # The stream outlives after_request, so flush its upstream timings here
+        metrics.maybe_flush()
+
+    def events():
+        nonlocal slot_id
+        # Commit headers right away so time-to-first-byte doesn't wait
+        # for the transcript fetch or the first model token
+        yield ": stream open\n\n"
+
+        text = cached_text
+        if text is None and not leader:
+            # Same request already running on some worker: reuse its answer
+            try:
+                text = singleflight.wait(key, lambda: llm_cache.peek(key))
+            except singleflight.LeaderFailed as e:
+                yield _sse("error", {"error": str(e)})
+                return
+        if text is not None:
+            yield _sse("chunk", {"text": text})
+            yield _sse("done", {"cached": True})
+            return
+
+        upstream = None
+        parts = []
+        try:
+            # build_query may call the model itself (video summaries), each
+            # call taking its own slot, so hold none while it runs: a held
+            # slot could leave those calls waiting on us
+            admission.release(slot_id)
+            slot_id = None
+            query = ask_service.build_query(mode, prompt)
+            slot_id = admission.acquire()
+            upstream = ask_service.stream(query)
+            for text in upstream:
+                if text:
+                    parts.append(text)
+                    yield _sse("chunk", {"text": text})
+            # Publish before releasing the lock so waiting workers find it
+            llm_cache.put(key, "".join(parts))
+        except GeneratorExit:
+            # Client went away: stop pulling from the model and don't cache
+            # a partial answer
+            if upstream is not None:
+                upstream.close()
+            raise
+        except admission.Rejected as e:
+            yield _sse("error", {"error": str(e), "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            yield _sse("error", {"error": str(e)})
+            return
+        finally:
+            release()
+
+        yield _sse("done", {"cached": False})
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    # Also covers clients that disconnect before the stream starts
+    response.call_on_close(release)
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+# Submit-and-poll variant of /api/ask. The job runs in ask_worker.py, so
+# page-serving workers never wait on the LLM.
+#   POST /api/ask/jobs        same body as /api/ask -> 202 {job_id, status_url}
+#   GET  /api/ask/jobs/<id>   -> {status: queued|running|done|error, response?}
+@app.route("/api/ask/jobs", methods=["POST"])
+def ask_job_submit():
+    data = request.get_json(silent=True) or {}
+    mode = data.get("mode")
+    prompt = data.get("prompt")
+
+    if mode not in ask_service.ASK_MODES:
+        return jsonify({"error": "Invalid mode"}), 400
+
+    bypass = _cache_bypass(data)
+    # A cached answer is recorded as an already finished job
+    _, cached_text = llm_cache.lookup(
+        mode, ask_service.cache_prompt(mode, prompt), ask_service.model_name(), bypass=bypass
+    )
+    job_id = ask_jobs.submit(mode, prompt, bypass=bypass, result=cached_text)
+
+    status_url = url_for("ask_job_status", job_id=job_id)
+    response = jsonify({
+        "job_id": job_id,
+        "status": ask_jobs.DONE if cached_text is not None else ask_jobs.QUEUED,
+        "status_url": status_url,
+    })
+    response.status_code = 202
+    response.headers["Location"] = status_url
+    return response
+
+
+@app.route("/api/ask/jobs/<job_id>")
+def ask_job_status(job_id):
+    job = ask_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job["status"] in (ask_jobs.QUEUED, ask_jobs.RUNNING):
+        response = jsonify(job)
+        response.headers["Retry-After"] = "2"
+        return response
+    return jsonify(job)
+
+
+# Response / transcript cache counters for this worker, plus LLM slot usage
+@app.route("/admin/ai-cache")
+def admin_ai_cache():
+    token = request.args.get("t")
+    if token != os.getenv("ADMIN_TOKEN", "dev"):
+        return "Forbidden", 403
+    return jsonify({
+        "pid": os.getpid(),
+        "responses": llm_cache.get_stats(),
+        "transcripts": transcript_cache.get_stats(),
+        "admission": admission.get_stats(),
+    })
+
 # Task completion endpoint
 @app.route("/api/task/complete", methods=["POST"])
 def mark_task_done():
@@ -323,13 +762,86 @@ def admin_refresh():
     if token != os.getenv("ADMIN_TOKEN", "dev"):
         return "Forbidden", 403
     try:
-        db_cache.refresh_cache(Schedule_data_script_url)
+        db_cache.refresh_cache(Schedule_data_script_url, source="admin")
         return "OK"
     except Exception as e:
         app.logger.exception("Manual refresh failed")
         return f"Error: {e}", 500
 
 
+# Recent refreshes with per-phase timings and row counts (refresh_runs table)
+@app.route("/admin/refresh-history")
+def admin_refresh_history():
+    token = request.args.get("t")
+    if token != os.getenv("ADMIN_TOKEN", "dev"):
+        return "Forbidden", 403
+    n = max(1, min(request.args.get("n", 50, type=int), db_cache.REFRESH_HISTORY_KEEP))
+    return jsonify({"runs": db_cache.get_refresh_runs(n)})
+
+
+# Prometheus text exposition, summed over all worker processes (see metrics.py)
+@app.route("/admin/metrics")
+def admin_metrics():
+    token = request.args.get("t")
+    if token != os.getenv("ADMIN_TOKEN", "dev"):
+        return "Forbidden", 403
+    slots = admission.get_stats()
+    gauges = {
+        "app_ask_jobs_queued": ask_jobs.queue_depth(),
+        "app_llm_slots_running": slots["running"] or 0,
+        "app_llm_slots_waiting": slots["queue_depth"] or 0,
+    }
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4")
+
+
+# Slowest schedule.db statements seen by this worker (needs DB_PROFILE=1)
+#   ?n=20&sort=max_ms|total_ms|count|slow
+@app.route("/admin/db-queries")
+def admin_db_queries():
+    token = request.args.get("t")
+    if token != os.getenv("ADMIN_TOKEN", "dev"):
+        return "Forbidden", 403
+    if request.args.get("reset") == "1":
+        db_profiler.reset()
+    return jsonify({
+        "pid": os.getpid(),
+        "enabled": db_profiler.ENABLED,
+        "slow_ms": db_profiler.SLOW_MS,
+        "statements": db_profiler.top(
+            request.args.get("n", 20, type=int), request.args.get("sort", "max_ms")
+        ),
+    })
+
+
+# Startup-time report for this worker, broken down by import phase
+@app.route("/admin/startup")
+def admin_startup():
+    token = request.args.get("t")
+    if token != os.getenv("ADMIN_TOKEN", "dev"):
+        return "Forbidden", 403
+    return jsonify({
+        "pid": os.getpid(),
+        "lazy_init": LAZY_INIT,
+        "import_ms": IMPORT_MS,
+        "phases": [
+            {"phase": name, "ms": ms}
+            for name, ms in STARTUP_PHASES + ask_service.INIT_PHASES
+        ],
+    })
+
+
+if not LAZY_INIT:
+    with _startup_phase("AI clients"):
+        ask_service.get_llm().warm()
+        ask_service.get_transcripts().warm()
+
+IMPORT_MS = round((time.perf_counter() - _IMPORT_T0) * 1000, 2)
+app.logger.info(
+    "startup %.1f ms (%s)", IMPORT_MS,
+    ", ".join(f"{name}={ms}ms" for name, ms in STARTUP_PHASES),
+)
+
+
 # ---------- DEV-ONLY BACKGROUND SCHEDULER ----------
 # This runs ONLY when launched as `python app.py` (local dev),
 # not under PythonAnywhere's uWSGI import.
@@ -340,7 +852,7 @@ if __name__ == '__main__':
         import atexit
 
         scheduler = BackgroundScheduler(timezone="Asia/Kolkata", daemon=True)
-        scheduler.add_job(lambda: db_cache.refresh_cache(Schedule_data_script_url),
+        scheduler.add_job(lambda: db_cache.refresh_cache(Schedule_data_script_url, source="scheduler"),
                           trigger="cron", minute=0)
         scheduler.start()
         atexit.register(lambda: scheduler.shutdown(wait=False))
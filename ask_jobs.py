@@ -0,0 +1,209 @@
+# ask_jobs.py
+"""
+SQLite-backed job table for long-running /api/ask requests.
+
+Web workers only insert a row and return its id; ask_worker.py (a separate
+process) claims queued jobs, runs them through ask_service and stores the
+result for the status endpoint to read.
+"""
+import os
+import time
+import uuid
+import sqlite3
+from typing import Any, Dict, Optional
+from contextlib import contextmanager
+
+import db_cache
+
+# ------------ Configuration ------------
+JOBS_DB_PATH = os.path.join(db_cache.DATA_DIR, "ask_jobs.db")
+
+# A running job not finished within this many seconds is handed out again
+# (its worker probably died)
+STALE_AFTER_SECS = int(os.getenv("ASK_JOB_STALE_SECS", "600"))
+
+# Finished jobs are deleted after this long
+KEEP_FINISHED_SECS = int(os.getenv("ASK_JOB_KEEP_HOURS", "24")) * 3600
+
+MAX_ATTEMPTS = 3
+
+QUEUED, RUNNING, DONE, ERROR = "queued", "running", "done", "error"
+
+
+# ------------ Database Setup ------------
+@contextmanager
+def get_connection():
+    """Context manager for job database connections."""
+    conn = None
+    try:
+        conn = sqlite3.connect(JOBS_DB_PATH, timeout=10)
+        conn.row_factory = sqlite3.Row
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def init_db():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ask_jobs (
+                id TEXT PRIMARY KEY,
+                mode TEXT NOT NULL,
+                prompt TEXT,
+                bypass INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cached INTEGER NOT NULL DEFAULT 0,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_pid INTEGER,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_ask_jobs_status
+            ON ask_jobs(status, created_at)
+        """)
+        conn.commit()
+
+
+# ------------ Web side ------------
+def submit(mode: str, prompt: Optional[str], bypass: bool = False,
+           result: Optional[str] = None) -> str:
+    """
+    Queue a job and return its id. Pass result to record an answer that is
+    already known (e.g. a cache hit) as a finished job.
+    """
+    init_db()
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    status = DONE if result is not None else QUEUED
+    with get_connection() as conn:
+        conn.execute("""
+            INSERT INTO ask_jobs (id, mode, prompt, bypass, status, result, cached,
+                                  created_at, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (job_id, mode, prompt, 1 if bypass else 0, status, result,
+              1 if result is not None else 0, now, now if result is not None else None))
+        conn.commit()
+    return job_id
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    """Public view of a job, or None if unknown."""
+    init_db()
+    with get_connection() as conn:
+        row = conn.execute("SELECT * FROM ask_jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return None
+
+    job = {
+        "job_id": row["id"],
+        "mode": row["mode"],
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+    }
+    if row["status"] == DONE:
+        job["response"] = row["result"]
+        job["cached"] = bool(row["cached"])
+    elif row["status"] == ERROR:
+        job["error"] = row["error"]
+    return job
+
+
+def queue_depth() -> int:
+    init_db()
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM ask_jobs WHERE status = ?", (QUEUED,)
+        ).fetchone()[0]
+
+
+# ------------ Worker side ------------
+def claim_next(worker_pid: int) -> Optional[sqlite3.Row]:
+    """
+    Atomically move the oldest queued (or stale running) job to running
+    and return it. Safe with several worker processes.
+    """
+    init_db()
+    now = time.time()
+    with get_connection() as conn:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can
+        # never claim the same row
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("""
+                SELECT * FROM ask_jobs
+                WHERE (status = ? OR (status = ? AND started_at < ?))
+                  AND attempts < ?
+                ORDER BY created_at
+                LIMIT 1
+            """, (QUEUED, RUNNING, now - STALE_AFTER_SECS, MAX_ATTEMPTS)).fetchone()
+            if row is not None:
+                conn.execute("""
+                    UPDATE ask_jobs
+                    SET status = ?, started_at = ?, worker_pid = ?, attempts = attempts + 1
+                    WHERE id = ?
+                """, (RUNNING, now, worker_pid, row["id"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    return row
+
+
+def complete(job_id: str, result: str, cached: bool = False) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            UPDATE ask_jobs SET status = ?, result = ?, cached = ?, finished_at = ?
+            WHERE id = ?
+        """, (DONE, result, 1 if cached else 0, time.time(), job_id))
+        conn.commit()
+
+
+def requeue(job_id: str) -> None:
+    """Put a claimed job back without using up an attempt (e.g. no LLM slot)."""
+    with get_connection() as conn:
+        conn.execute("""
+            UPDATE ask_jobs
+            SET status = ?, started_at = NULL, worker_pid = NULL, attempts = attempts - 1
+            WHERE id = ?
+        """, (QUEUED, job_id))
+        conn.commit()
+
+
+def fail(job_id: str, error: str) -> None:
+    with get_connection() as conn:
+        conn.execute("""
+            UPDATE ask_jobs SET status = ?, error = ?, finished_at = ?
+            WHERE id = ?
+        """, (ERROR, error, time.time(), job_id))
+        conn.commit()
+
+
+def purge_finished() -> int:
+    """
+    Fail stale jobs that used up their attempts, then delete finished jobs
+    older than KEEP_FINISHED_SECS. Returns the number deleted.
+    """
+    init_db()
+    now = time.time()
+    with get_connection() as conn:
+        conn.execute("""
+            UPDATE ask_jobs SET status = ?, error = ?, finished_at = ?
+            WHERE status = ? AND started_at < ? AND attempts >= ?
+        """, (ERROR, "Worker did not finish the job", now,
+              RUNNING, now - STALE_AFTER_SECS, MAX_ATTEMPTS))
+        cursor = conn.execute("""
+            DELETE FROM ask_jobs
+            WHERE status IN (?, ?) AND finished_at < ?
+        """, (DONE, ERROR, now - KEEP_FINISHED_SECS))
+        conn.commit()
+        return cursor.rowcount
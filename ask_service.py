@@ -0,0 +1,119 @@
+# ask_service.py
+"""
+The /api/ask pipeline (transcripts, prompt building, LLM, response
+cache), shared by the Flask routes and the background job worker.
+The LLM and transcript back ends come from providers.py (real or offline
+fakes); heavy client libraries are imported on first use.
+"""
+import time
+from typing import Iterator, Optional, Tuple
+
+import admission
+import llm_cache
+import metrics
+import providers
+import summarize
+import transcript_cache
+
+GEMINI_MODEL = "gemini-2.0-flash"
+
+ASK_MODES = ("video", "notes", "general")
+
+# (phase, ms) for lazily initialised clients; shown in /admin/startup
+INIT_PHASES = providers.INIT_PHASES
+
+_llm: Optional[providers.LLMProvider] = None
+_transcripts: Optional[providers.TranscriptProvider] = None
+
+
+def get_llm() -> providers.LLMProvider:
+    global _llm
+    if _llm is None:
+        _llm = providers.llm_from_env(GEMINI_MODEL)
+    return _llm
+
+
+def get_transcripts() -> providers.TranscriptProvider:
+    global _transcripts
+    if _transcripts is None:
+        _transcripts = providers.transcripts_from_env()
+    return _transcripts
+
+
+def set_providers(llm: Optional[providers.LLMProvider] = None,
+                  transcripts: Optional[providers.TranscriptProvider] = None) -> None:
+    """Swap back ends at runtime (tests, benchmarks)."""
+    global _llm, _transcripts
+    if llm is not None:
+        _llm = llm
+    if transcripts is not None:
+        _transcripts = transcripts
+
+
+def model_name() -> str:
+    """Model part of the response-cache key; fakes never share real entries."""
+    return get_llm().model_name
+
+
+def video_id(prompt: Optional[str]) -> str:
+    return (prompt or "").strip().split("v=")[-1].split("&")[0]
+
+
+def cache_prompt(mode: str, prompt: Optional[str]) -> Optional[str]:
+    """Prompt used for cache keys: video answers depend only on the video id."""
+    return video_id(prompt) if mode == "video" else prompt
+
+
+def generate(query: str) -> str:
+    """One upstream call, holding an LLM slot (admission.Rejected if none)."""
+    llm = get_llm()
+    with admission.slot():
+        t0 = time.perf_counter()
+        try:
+            return llm.generate(query)
+        finally:
+            metrics.observe("app_ask_upstream_duration_seconds", time.perf_counter() - t0,
+                            provider=llm.model_name, call="generate")
+
+
+def stream(query: str) -> Iterator[str]:
+    """Provider stream, timed to the first chunk and to the end."""
+    llm = get_llm()
+    t0 = time.perf_counter()
+    first = True
+    try:
+        for text in llm.stream(query):
+            if first:
+                first = False
+                metrics.observe("app_ask_upstream_duration_seconds", time.perf_counter() - t0,
+                                provider=llm.model_name, call="stream_first_chunk")
+            yield text
+    finally:
+        metrics.observe("app_ask_upstream_duration_seconds", time.perf_counter() - t0,
+                        provider=llm.model_name, call="stream")
+
+
+def build_query(mode: str, prompt: Optional[str]) -> str:
+    """Turn an /api/ask request into the Gemini prompt (fetches transcripts)."""
+    if mode == "video":
+        transcript_list = transcript_cache.get_or_fetch(video_id(prompt), get_transcripts().fetch)
+        # Long lectures are summarised chunk by chunk first (map-reduce)
+        return summarize.video_notes_query(transcript_list, generate, model_name())
+    if mode == "notes":
+        return f"Answer this using study notes: {prompt}"
+    return prompt
+
+
+def answer(mode: str, prompt: Optional[str], bypass: bool = False) -> Tuple[str, bool]:
+    """
+    Blocking answer for one request. Returns (text, cached).
+    Raises admission.Rejected when a fresh answer is needed but every LLM
+    slot is busy. Each upstream call (summary chunks included) takes its
+    own slot, so the limit counts calls, not requests.
+    """
+    def fresh() -> str:
+        return generate(build_query(mode, prompt))
+
+    return llm_cache.get_or_generate(
+        mode, cache_prompt(mode, prompt), model_name(), fresh, bypass=bypass,
+    )
@@ -0,0 +1,77 @@
+# ask_worker.py
+"""
+Background worker for queued /api/ask jobs (see ask_jobs.py).
+
+Run it as a separate long-lived process, e.g. a PythonAnywhere
+always-on task:
+
+    python ask_worker.py            # loop forever
+    python ask_worker.py --once     # drain the queue and exit
+"""
+import os
+import sys
+import time
+import argparse
+
+from dotenv import load_dotenv
+
+# Before the project imports: LLM_MAX_CONCURRENCY etc. are read at import
+# and must match the web workers sharing llm_slots.db
+load_dotenv()
+
+import admission
+import ask_jobs
+import ask_service
+import metrics
+import summarize
+
+POLL_SECS = float(os.getenv("ASK_WORKER_POLL_SECS", "1.0"))
+
+# This process may use threads (unlike uWSGI web workers), so long videos
+# are summarised in parallel here; more threads than LLM slots only queue
+SUMMARY_WORKERS = min(int(os.getenv("ASK_WORKER_SUMMARY_WORKERS", "4")), admission.MAX_CONCURRENCY)
+PURGE_EVERY_SECS = 600
+
+
+def run_job(job) -> None:
+    try:
+        text, cached = ask_service.answer(job["mode"], job["prompt"], bypass=bool(job["bypass"]))
+        ask_jobs.complete(job["id"], text, cached)
+        print(f"[ask_worker] job {job['id']} done (cached={cached})")
+    except admission.Rejected as e:
+        # Web traffic holds every LLM slot; try again later
+        ask_jobs.requeue(job["id"])
+        print(f"[ask_worker] job {job['id']} requeued: {e}")
+        time.sleep(e.retry_after)
+    except Exception as e:
+        ask_jobs.fail(job["id"], str(e))
+        print(f"[ask_worker] job {job['id']} failed: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued /api/ask jobs")
+    parser.add_argument("--once", action="store_true", help="exit when the queue is empty")
+    args = parser.parse_args()
+
+    summarize.MAX_WORKERS = max(1, SUMMARY_WORKERS)
+    pid = os.getpid()
+    last_purge = 0.0
+    print(f"[ask_worker] started pid={pid} summary_workers={summarize.MAX_WORKERS}")
+
+    while True:
+        if time.time() - last_purge > PURGE_EVERY_SECS:
+            ask_jobs.purge_finished()
+            last_purge = time.time()
+
+        metrics.maybe_flush()
+        job = ask_jobs.claim_next(pid)
+        if job is not None:
+            run_job(job)
+            continue
+        if args.once:
+            return 0
+        time.sleep(POLL_SECS)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
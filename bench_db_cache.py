@@ -0,0 +1,188 @@
+# bench_db_cache.py
+"""
+Micro-benchmarks for the db_cache hot paths.
+
+Runs each benchmark at several table sizes against a throwaway database
+(the real data_cache is untouched) and writes the timings as JSON, so runs
+before and after a change can be compared:
+
+    python bench_db_cache.py --out before.json
+    ... change db_cache ...
+    python bench_db_cache.py --out after.json --compare before.json
+
+--codecs also stores the schedule with every row codec (row_codec.py) and
+reports decode times next to json, plus the vacuumed database size:
+
+    python bench_db_cache.py --sizes 10000 --codecs
+
+Sizes are daily rows, spread over a year of synthetic schedule
+(synth_schedule.py) with a matching completion history.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+import argparse
+import platform
+import statistics
+from datetime import date
+from typing import Any, Callable, Dict
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import db_cache
+import row_codec
+import schedule_index
+import synth_schedule
+
+DEFAULT_SIZES = "1000,10000,100000"
+
+
+# ------------ Timing ------------
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Run fn() repeat times (after one untimed warm-up) and summarise in ms."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return {
+        "min_ms": round(min(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "repeat": repeat,
+    }
+
+
+def bench_size(daily_count: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    db_cache.DB_PATH = os.path.join(tempfile.mkdtemp(), "schedule.db")
+    payload = synth_schedule.generate(daily_count, start=date(2025, 1, 1), months=12)
+    results: Dict[str, Dict[str, float]] = {}
+
+    raw = json.dumps(payload).encode("utf-8")
+    with mock.patch.object(db_cache, "_fetch_raw", return_value=raw):
+        results["refresh_cache"] = measure(lambda: db_cache.refresh_cache("bench"), repeat)
+    synth_schedule.write_completions(synth_schedule.completions(payload))
+
+    results["get_cached_tables"] = measure(db_cache.get_cached_tables, repeat)
+
+    with db_cache.get_db_connection() as conn:
+        completions = db_cache._load_completions(conn.cursor())
+        stored = [r[0] for r in conn.execute("SELECT row_data FROM daily_schedule ORDER BY id")]
+    # Same key as earlier runs, so --compare keeps tracking it
+    daily_rows = [row_codec.decode(r) for r in stored]
+    results["_merge_completion_status"] = measure(
+        lambda: db_cache._merge_completion_status(daily_rows, completions, "daily"), repeat)
+    # _iter_merged works in place, so each run decodes fresh rows (as the routes do)
+    results["decode+merge(daily)"] = measure(
+        lambda: sum(1 for _ in db_cache._iter_merged(
+            (row_codec.decode(r) for r in stored), completions, "daily")), repeat)
+    results["iter_rows(daily)"] = measure(
+        lambda: sum(1 for _ in db_cache.iter_rows("daily_OCT", completions)), repeat)
+
+    raw_daily = payload["daily_OCT"]
+    results["_normalize_daily_dates"] = measure(
+        lambda: db_cache._normalize_daily_dates(raw_daily), repeat)
+
+    toggle = {"on": True}
+
+    def mark_stage():
+        toggle["on"] = not toggle["on"]
+        db_cache.mark_task_stage(f"daily_{daily_count // 2}", "daily", "notes", toggle["on"])
+    results["mark_task_stage"] = measure(mark_stage, repeat)
+
+    busy_day = db_cache._to_ist_date_str(raw_daily[len(raw_daily) // 2][3])
+    results["get_task_progress(date)"] = measure(lambda: db_cache.get_task_progress(busy_day), repeat)
+    results["get_task_progress"] = measure(db_cache.get_task_progress, repeat)
+    return results
+
+
+def bench_codecs(daily_count: int, repeat: int) -> Dict[str, Any]:
+    """
+    Store the same schedule with each available row codec and time reading
+    it back. Returns {"results": timings, "db_bytes": {codec: size}}.
+    """
+    payload = synth_schedule.generate(daily_count, start=date(2025, 1, 1), months=12)
+    results: Dict[str, Dict[str, float]] = {}
+    db_bytes: Dict[str, int] = {}
+    for codec in row_codec.available():
+        db_cache.DB_PATH = os.path.join(tempfile.mkdtemp(), "schedule.db")
+        with mock.patch.dict(os.environ, {"ROW_CODEC": codec}):
+            db_cache.load_payload(payload)
+        with db_cache.get_db_connection() as conn:
+            stored = [r[0] for r in conn.execute("SELECT row_data FROM daily_schedule ORDER BY id")]
+            conn.execute("VACUUM")
+        db_bytes[codec] = os.path.getsize(db_cache.DB_PATH)
+
+        results[f"decode(daily)[{codec}]"] = measure(
+            lambda: [row_codec.decode(r) for r in stored], repeat)
+        results[f"get_cached_tables[{codec}]"] = measure(db_cache.get_cached_tables, repeat)
+        results[f"schedule_index_build[{codec}]"] = measure(
+            lambda: schedule_index._load("bench"), repeat)
+    return {"results": results, "db_bytes": db_bytes}
+
+
+# ------------ Reporting ------------
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print median change per benchmark (negative = faster)."""
+    print(f"\n{'size':>8}  {'benchmark':<36} {'baseline':>11} {'current':>11} {'change':>8}")
+    for size, benches in current["results"].items():
+        for name, now in benches.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before:
+                continue
+            change = (now["median_ms"] - before["median_ms"]) / before["median_ms"] * 100 if before["median_ms"] else 0.0
+            print(f"{size:>8}  {name:<36} {before['median_ms']:>9.2f}ms {now['median_ms']:>9.2f}ms {change:>+7.1f}%")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark db_cache hot paths")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated daily row counts")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--codecs", action="store_true", help="also compare row codecs (decode time, DB size)")
+    args = parser.parse_args()
+
+    report: Dict[str, Any] = {
+        "meta": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": {},
+    }
+    original_path = db_cache.DB_PATH
+    try:
+        for size in (int(s) for s in args.sizes.split(",") if s):
+            print(f"[bench] {size} rows ...", file=sys.stderr)
+            report["results"][str(size)] = bench_size(size, args.repeat)
+            if args.codecs:
+                codecs = bench_codecs(size, args.repeat)
+                report["results"][str(size)].update(codecs["results"])
+                report.setdefault("db_bytes", {})[str(size)] = codecs["db_bytes"]
+    finally:
+        db_cache.DB_PATH = original_path
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+        print(f"[bench] wrote {args.out}", file=sys.stderr)
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
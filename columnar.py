@@ -0,0 +1,95 @@
+# columnar.py
+"""
+Compact column-oriented wire format for the schedule tables that the
+templates inline as window.ITEMS (decoded by static/js/columnar.js).
+
+    rows = [["id", "Goals", "first_read"],
+            ["1",  "GS1",   0],
+            ["2",  "GS1",   1]]
+
+    encode(rows) == {
+        "n": 2,
+        "cols": ["id", "Goals", "first_read"],
+        "kind": ["r", "d", "i"],
+        "dict": ["GS1"],
+        "data": [["1", "2"], [0, 0], [0, 1]],
+    }
+
+Column kinds:
+  "r"  raw JSON values
+  "d"  indexes into the shared "dict" string table
+  "i"  integers (stage flags and other all-int columns)
+"""
+from typing import Any, Dict, Iterable, List
+
+# Always dictionary-encode these; other string columns are dictionary-encoded
+# when at most half of their values are distinct.
+DICT_COLUMNS = {"Goals", "Status", "month_year", "prep_phase", "week_no", "Date", "monthly_task"}
+
+
+def encode(rows: Iterable[List[Any]]) -> Dict[str, Any]:
+    """
+    Encode a header + data 2-D table into the columnar payload. rows may be
+    any iterable (e.g. db_cache.iter_rows); it is read once, row by row.
+    An already encoded payload (records.to_wire) is returned as is.
+    """
+    if isinstance(rows, dict):
+        return rows
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return {"n": 0, "cols": [], "kind": [], "dict": [], "data": []}
+
+    width = len(header)
+    columns: List[List[Any]] = [[] for _ in header]
+    for row in rows:
+        if len(row) >= width:
+            for col, value in zip(columns, row):
+                col.append(value)
+        else:
+            for i, col in enumerate(columns):
+                col.append(row[i] if i < len(row) else None)
+    return encode_columns(header, columns)
+
+
+def encode_columns(header: List[Any], columns: List[List[Any]]) -> Dict[str, Any]:
+    """Encode a table given as one value list per header column."""
+    n = len(columns[0]) if columns else 0
+    columns = list(columns)
+    strings: Dict[Any, int] = {}
+    kinds: List[str] = []
+    for i, name in enumerate(header):
+        col = columns[i]
+
+        if col and all(type(v) is int for v in col):
+            kinds.append("i")
+        elif all(v is None or isinstance(v, str) for v in col) and (
+            name in DICT_COLUMNS or len(set(col)) * 2 <= n
+        ):
+            kinds.append("d")
+            columns[i] = [strings.setdefault(v, len(strings)) for v in col]
+        else:
+            kinds.append("r")
+
+    return {
+        "n": n,
+        "cols": list(header),
+        "kind": kinds,
+        "dict": list(strings),
+        "data": columns,
+    }
+
+
+def decode(payload: Dict[str, Any]) -> List[List[Any]]:
+    """Inverse of encode(); returns header + data rows."""
+    cols = payload.get("cols", [])
+    if not cols:
+        return []
+    strings = payload.get("dict", [])
+    columns = [
+        [strings[v] for v in col] if kind == "d" else col
+        for col, kind in zip(payload.get("data", []), payload.get("kind", []))
+    ]
+    rows = [list(cols)]
+    rows.extend(list(row) for row in zip(*columns))
+    return rows
@@ -0,0 +1,146 @@
+# compression.py
+import os
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Iterator, Optional
+
+# brotli is optional; without it we only ever negotiate gzip
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on host packages
+    brotli = None
+
+# ------------ Configuration ------------
+# Bodies smaller than this are sent as-is (headers would eat the savings)
+MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Rendered pages / JSON bodies kept per worker
+CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "64"))
+
+COMPRESSIBLE_MIMETYPES = ("text/html", "application/json")
+
+
+# ------------ Negotiation ------------
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    out = {}
+    for part in (header or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        out[coding.strip().lower()] = q
+    return out
+
+
+def supported_encodings():
+    """Encodings this worker can produce, best first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best content-coding the client accepts.
+    Returns 'br', 'gzip' or None (identity).
+    """
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    for coding in supported_encodings():
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with the given content-coding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        # mtime=0 keeps the output stable for identical bodies
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Incrementally compress a chunked body (for streamed responses)."""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in chunks:
+            out = compressor.process(chunk)
+            if out:
+                yield out
+        yield compressor.finish()
+    elif encoding == "gzip":
+        # wbits=31 -> gzip container
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        yield compressor.flush()
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def is_compressible(mimetype: str, size: int) -> bool:
+    return size >= MIN_SIZE and mimetype in COMPRESSIBLE_MIMETYPES
+
+
+# ------------ Per-worker cache ------------
+class ResponseCache:
+    """
+    Small LRU of rendered bodies keyed by route key.
+    Each entry remembers the data version it was built for, plus any
+    compressed variants, so a body is compressed at most once per version.
+    """
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry["version"] != version:
+            # Data changed underneath us; drop the stale body and variants
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry["variants"][None]
+
+    def put(self, key: Hashable, version: str, body: bytes) -> None:
+        self._entries[key] = {
+            "version": version,
+            "etag": hashlib.sha1(body).hexdigest()[:16],
+            "variants": {None: body},
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def etag(self, key: Hashable) -> str:
+        """Content hash of the identity body (same across workers)."""
+        return self._entries[key]["etag"]
+
+    def encoded(self, key: Hashable, encoding: Optional[str]) -> bytes:
+        """Return the body for key in the requested encoding, compressing once."""
+        variants = self._entries[key]["variants"]
+        if encoding not in variants:
+            variants[encoding] = compress(variants[None], encoding)
+        return variants[encoding]
+
+    def clear(self) -> None:
+        self._entries.clear()
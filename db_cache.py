@@ -1,15 +1,26 @@
 # db_cache.py
 import os
+import re
 import json
+import time
 import sqlite3
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterable, Iterator, Callable, TypeVar, TYPE_CHECKING
+from collections import Counter
 from contextlib import contextmanager
 
 import pytz
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+
+import metrics
+import db_profiler
+import row_codec
+from records import DONE_STATUSES, NO_COMPLETION, Completion
+from timing import phase
+
+# requests/urllib3 are only needed by refresh_cache(); they are imported
+# lazily so page-serving workers don't pay for them at startup.
+if TYPE_CHECKING:
+    import requests
 
 # ------------ Configuration ------------
 # Directory to store database
@@ -27,6 +38,19 @@ RETRY_BACKOFF = 0.5  # seconds
 # Timezone for stamps and normalization
 IST = pytz.timezone("Asia/Kolkata")
 
+# Distinct UTC timestamps in one refresh before the NumPy batch conversion
+# is used (NumPy is optional and only imported then)
+NUMPY_MIN_BATCH = 256
+
+# refresh_runs rows kept (oldest are pruned)
+REFRESH_HISTORY_KEEP = 500
+
+# Writes that hit "database is locked" (another worker writing) are retried
+BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.1  # seconds, doubled per retry
+
+T = TypeVar("T")
+
 os.makedirs(DATA_DIR, exist_ok=True)
 
 
@@ -90,23 +114,62 @@ def init_db():
             ON task_completions(month_year)
         """)
         
+        # One row per refresh_cache() call, with per-phase timings
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS refresh_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TEXT NOT NULL,
+                source TEXT,
+                outcome TEXT NOT NULL,
+                error TEXT,
+                fetch_ms REAL,
+                parse_ms REAL,
+                validate_ms REAL,
+                normalize_ms REAL,
+                write_ms REAL,
+                total_ms REAL,
+                payload_bytes INTEGER,
+                monthly_rows INTEGER,
+                daily_rows INTEGER,
+                changed_rows INTEGER,
+                removed_rows INTEGER
+            )
+        """)
+        
         conn.commit()
 
 
 @contextmanager
 def get_db_connection():
-    """Context manager for database connections."""
+    """Context manager for database connections (profiled with DB_PROFILE=1)."""
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH, timeout=10)
+        conn = db_profiler.connect(DB_PATH, timeout=10)
         yield conn
     finally:
         if conn:
             conn.close()
 
 
+def _with_busy_retry(write: Callable[[], T]) -> T:
+    """Run write(), retrying a few times while SQLite reports the database locked."""
+    for attempt in range(BUSY_RETRIES + 1):
+        try:
+            return write()
+        except sqlite3.OperationalError as e:
+            message = str(e)
+            if attempt == BUSY_RETRIES or ("locked" not in message and "busy" not in message):
+                raise
+            metrics.inc("app_sqlite_busy_retries_total", db="schedule")
+            time.sleep(BUSY_BACKOFF * (2 ** attempt))
+
+
 # ------------ HTTP Utilities ------------
-def _session_with_retries() -> requests.Session:
+def _session_with_retries() -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     s = requests.Session()
     retries = Retry(
         total=RETRY_TOTAL,
@@ -154,10 +217,87 @@ def _to_ist_date_str(value: str) -> str:
         return value
 
 
-def _normalize_daily_dates(daily_rows: List[List[Any]]) -> List[List[Any]]:
+# 'YYYY-MM-DDTHH:MM[:SS[.fff|.ffffff]]Z' - what Apps Script sends, and a
+# form NumPy's datetime64 parses exactly like datetime.fromisoformat
+_UTC_ISO_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}T(?:[01]\d|2[0-3]):[0-5]\d(?::[0-5]\d(?:\.\d{3}|\.\d{6})?)?Z"
+)
+
+# Asia/Kolkata has been a fixed UTC+05:30 since 1946 (pytz uses historic
+# offsets before that, so older dates keep the pytz path)
+_IST_FIXED_SINCE = "1946"
+_IST_OFFSET_MINUTES = 330
+
+_numpy = None
+
+
+def _import_numpy():
+    """numpy, or None if it is not installed (imported on first use)."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - depends on host packages
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+def _utc_iso_to_ist_dates(values: List[str]) -> Optional[List[str]]:
+    """
+    IST dates for _UTC_ISO_RE timestamps in one vectorized NumPy pass, or
+    None (caller falls back) without NumPy or if any value won't parse.
+    """
+    np = _import_numpy()
+    if np is None:
+        return None
+    try:
+        stamps = np.array([v[:-1] for v in values], dtype="datetime64[us]")
+    except ValueError:
+        return None
+    days = (stamps + np.timedelta64(_IST_OFFSET_MINUTES, "m")).astype("datetime64[D]")
+    return days.astype(str).tolist()
+
+
+def _bulk_to_ist_date_strs(values: List[Any]) -> List[Any]:
+    """
+    _to_ist_date_str over a whole column, with identical output. Plain
+    dates pass through, each distinct timestamp is converted once, and with
+    NumPy many distinct UTC timestamps are converted in one batch.
+    """
+    memo: Dict[str, str] = {}
+    pending: List[str] = []
+    for v in values:
+        if type(v) is not str or v in memo:
+            continue
+        if len(v) == 10 and v[4] == "-" and v[7] == "-":
+            memo[v] = v
+        else:
+            memo[v] = ""  # placeholder, filled below
+            pending.append(v)
+
+    if len(pending) >= NUMPY_MIN_BATCH:
+        # Year 9999 stays scalar: the IST date can overflow into year 10000,
+        # which datetime rejects (and _to_ist_date_str then keeps the UTC date)
+        batch = [v for v in pending if _IST_FIXED_SINCE <= v[:4] < "9999" and _UTC_ISO_RE.fullmatch(v)]
+        converted = _utc_iso_to_ist_dates(batch) if batch else None
+        if converted is not None:
+            memo.update(zip(batch, converted))
+            done = set(batch)
+            pending = [v for v in pending if v not in done]
+
+    for v in pending:
+        memo[v] = _to_ist_date_str(v)
+
+    # Non-strings go through the scalar function so they behave exactly as before
+    return [memo[v] if type(v) is str else _to_ist_date_str(v) for v in values]
+
+
+def _normalize_daily_dates(daily_rows: List[List[Any]], copy: bool = True) -> List[List[Any]]:
     """
     Given daily rows (header + data), return a new list where 'Date'
     is normalized to IST (YYYY-MM-DD). If header missing, return unchanged.
+    copy=False updates the rows in place instead of copying each one.
     """
     if not daily_rows:
         return daily_rows
@@ -168,18 +308,18 @@ def _normalize_daily_dates(daily_rows: List[List[Any]]) -> List[List[Any]]:
     except ValueError:
         return daily_rows
 
-    out = [header]
-    for row in daily_rows[1:]:
-        new_row = list(row)
-        if date_idx < len(new_row):
-            new_row[date_idx] = _to_ist_date_str(new_row[date_idx])
-        out.append(new_row)
-    return out
+    data = daily_rows[1:]
+    if copy:
+        data = [list(row) for row in data]
+    dated = [row for row in data if date_idx < len(row)]
+    for row, value in zip(dated, _bulk_to_ist_date_strs([row[date_idx] for row in dated])):
+        row[date_idx] = value
+    return [header] + data
 
 
 # ------------ Core Logic ------------
-def fetch_json(url: Optional[str] = None) -> Dict[str, Any]:
-    """Fetch JSON from Apps Script Web App."""
+def _fetch_raw(url: Optional[str] = None) -> bytes:
+    """Fetch the raw response body from Apps Script Web App."""
     url = url or os.getenv(ENV_VAR_URL)
     if not url:
         raise RuntimeError(f"Missing environment variable {ENV_VAR_URL}")
@@ -187,7 +327,12 @@ def fetch_json(url: Optional[str] = None) -> Dict[str, Any]:
     s = _session_with_retries()
     r = s.get(url, timeout=TIMEOUT_SECS)
     r.raise_for_status()
-    return r.json()
+    return r.content
+
+
+def fetch_json(url: Optional[str] = None) -> Dict[str, Any]:
+    """Fetch JSON from Apps Script Web App."""
+    return json.loads(_fetch_raw(url))
 
 
 def validate_payload(payload: Dict[str, Any]) -> Tuple[List[List[Any]], List[List[Any]]]:
@@ -209,23 +354,105 @@ def validate_payload(payload: Dict[str, Any]) -> Tuple[List[List[Any]], List[Lis
     return monthly, daily
 
 
-def refresh_cache(url: Optional[str] = None) -> str:
+def refresh_cache(url: Optional[str] = None, source: str = "manual") -> str:
     """
     Fetch from Apps Script, validate, normalize, and write to SQLite database atomically.
     Returns an ISO timestamp (IST) of when the cache was updated.
+    Every call, successful or not, is recorded in refresh_runs (see
+    get_refresh_runs); source says who asked (admin, cli, warmup, ...).
     """
+    run: Dict[str, Any] = {"started_at": datetime.now(IST).isoformat(), "source": source}
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        stamp = _refresh_cache(url, run)
+        outcome = "success"
+        return stamp
+    except Exception as e:
+        run["error"] = f"{type(e).__name__}: {e}"[:500]
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        metrics.inc("app_refresh_total", outcome=outcome)
+        metrics.observe("app_refresh_duration_seconds", elapsed)
+        run["outcome"] = outcome
+        run["total_ms"] = round(elapsed * 1000, 2)
+        _record_refresh_run(run)
+
+
+@contextmanager
+def _refresh_step(run: Dict[str, Any], name: str) -> Iterator[None]:
+    """Time one refresh phase into run[name + '_ms'] and Server-Timing."""
+    t0 = time.perf_counter()
+    try:
+        with phase(f"refresh_{name}"):
+            yield
+    finally:
+        run[f"{name}_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+
+def _refresh_cache(url: Optional[str], run: Dict[str, Any]) -> str:
+    with _refresh_step(run, "fetch"):
+        raw = _fetch_raw(url)
+    run["payload_bytes"] = len(raw)
+    with _refresh_step(run, "parse"):
+        payload = json.loads(raw)
+    return load_payload(payload, run, copy=False)
+
+
+def load_payload(payload: Dict[str, Any], run: Optional[Dict[str, Any]] = None,
+                 copy: bool = True) -> str:
+    """
+    Validate, normalize and store an Apps Script payload, replacing both
+    schedule tables. Returns the IST timestamp. refresh_cache() uses this
+    after fetching; tools can call it directly with a payload.
+    run, if given, receives phase timings and row counts. copy=False lets
+    the payload's daily rows be normalized in place (refresh_cache owns the
+    payload it just parsed).
+    """
+    run = run if run is not None else {}
+
     # Initialize database if it doesn't exist
     init_db()
-    
-    payload = fetch_json(url)
-    monthly, daily = validate_payload(payload)
+
+    with _refresh_step(run, "validate"):
+        monthly, daily = validate_payload(payload)
 
     # Normalize daily 'Date' to IST yyyy-mm-dd
-    daily = _normalize_daily_dates(daily)
+    with _refresh_step(run, "normalize"):
+        daily = _normalize_daily_dates(daily, copy=copy)
+
+    run["monthly_rows"] = max(len(monthly) - 1, 0)
+    run["daily_rows"] = max(len(daily) - 1, 0)
+    with _refresh_step(run, "write"):
+        return _with_busy_retry(lambda: _write_tables(monthly, daily, run))
+
 
+def _write_tables(monthly: List[List[Any]], daily: List[List[Any]],
+                  run: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Replace both schedule tables in one transaction. Returns the IST stamp.
+    Into run: changed_rows = new rows not stored before (added or edited),
+    removed_rows = stored rows with no identical new row (deleted or edited).
+    """
+    # Rows are stored with the configured ROW_CODEC (see row_codec.py)
+    encode = row_codec.encoder()
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
+        if run is not None:
+            # Compare serialized data rows (headers excluded) with what is stored
+            # now, bringing rows written with another codec to this one first
+            same_codec = row_codec.reencoder()
+            old_rows: Counter = Counter()
+            for table in ("monthly_schedule", "daily_schedule"):
+                cursor.execute(f"SELECT row_data FROM {table} ORDER BY id LIMIT -1 OFFSET 1")
+                old_rows.update(same_codec(row[0]) for row in cursor.fetchall())
+            new_rows = Counter(encode(row) for row in monthly[1:])
+            new_rows.update(encode(row) for row in daily[1:])
+            run["changed_rows"] = sum((new_rows - old_rows).values())
+            run["removed_rows"] = sum((old_rows - new_rows).values())
+        
         # Clear existing data
         cursor.execute("DELETE FROM monthly_schedule")
         cursor.execute("DELETE FROM daily_schedule")
@@ -234,7 +461,7 @@ def refresh_cache(url: Optional[str] = None) -> str:
         for row in monthly:
             cursor.execute(
                 "INSERT INTO monthly_schedule (row_data) VALUES (?)",
-                (json.dumps(row),)
+                (encode(row),)
             )
         
         # Insert daily data with extracted date for indexing
@@ -252,7 +479,7 @@ def refresh_cache(url: Optional[str] = None) -> str:
                 
                 cursor.execute(
                     "INSERT INTO daily_schedule (row_data, date) VALUES (?, ?)",
-                    (json.dumps(row), date_val)
+                    (encode(row), date_val)
                 )
         
         # Update metadata
@@ -261,12 +488,144 @@ def refresh_cache(url: Optional[str] = None) -> str:
             "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
             ("updated_at_ist", stamp)
         )
+        _bump_data_version(cursor)
         
         conn.commit()
     
     return stamp
 
 
+_REFRESH_RUN_COLUMNS = (
+    "started_at", "source", "outcome", "error",
+    "fetch_ms", "parse_ms", "validate_ms", "normalize_ms", "write_ms", "total_ms",
+    "payload_bytes", "monthly_rows", "daily_rows", "changed_rows", "removed_rows",
+)
+
+
+def _record_refresh_run(run: Dict[str, Any]) -> None:
+    """Store one refresh_runs row and prune old ones. Never raises."""
+    try:
+        init_db()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                f"INSERT INTO refresh_runs ({', '.join(_REFRESH_RUN_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in _REFRESH_RUN_COLUMNS)})",
+                tuple(run.get(col) for col in _REFRESH_RUN_COLUMNS),
+            )
+            cursor.execute("""
+                DELETE FROM refresh_runs WHERE id IN (
+                    SELECT id FROM refresh_runs ORDER BY id DESC LIMIT -1 OFFSET ?
+                )
+            """, (REFRESH_HISTORY_KEEP,))
+            conn.commit()
+    except Exception as e:
+        print(f"Error recording refresh run: {e}")
+
+
+def get_refresh_runs(limit: int = 50) -> List[Dict[str, Any]]:
+    """Most recent refresh runs first."""
+    init_db()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT id, {', '.join(_REFRESH_RUN_COLUMNS)} FROM refresh_runs ORDER BY id DESC LIMIT ?",
+            (limit,),
+        )
+        names = [d[0] for d in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def _bump_data_version(cursor: sqlite3.Cursor) -> None:
+    """
+    Increment the data version counter. Call inside the same transaction
+    as any write that changes what get_cached_tables() returns.
+    """
+    cursor.execute("""
+        INSERT INTO metadata (key, value) VALUES ('data_version', '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    """)
+
+
+def get_data_version() -> str:
+    """
+    Return a cheap token that changes whenever the cached tables or the
+    task completions change. Used by the app to key rendered-page caches.
+    """
+    try:
+        with phase("db_version"), get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT key, value FROM metadata
+                WHERE key IN ('data_version', 'updated_at_ist')
+            """)
+            meta = dict(cursor.fetchall())
+    except sqlite3.Error:
+        return "0"
+    return f"{meta.get('data_version', '0')}@{meta.get('updated_at_ist', '')}"
+
+
+def get_refresh_stamp() -> str:
+    """
+    The updated_at_ist stamp of the last refresh ("" if none). Unlike
+    get_data_version() it does not change when completions change, so it
+    keys caches of the sheet data alone.
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM metadata WHERE key = 'updated_at_ist'")
+            row = cursor.fetchone()
+    except sqlite3.Error:
+        return ""
+    return row[0] if row else ""
+
+
+def has_cached_data() -> bool:
+    """True once refresh_cache() has completed at least once."""
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM metadata WHERE key = 'updated_at_ist'")
+            return cursor.fetchone() is not None
+    except sqlite3.Error:
+        return False
+
+
+# Public table name -> (SQLite table, task_type prefix used in task_completions)
+TABLES = {
+    "Monthly": ("monthly_schedule", "monthly"),
+    "daily_OCT": ("daily_schedule", "daily"),
+}
+
+# month_year keys use the sheet's spelling ("sept", not "sep")
+_MONTH_KEYS = ["jan", "feb", "mar", "apr", "may", "jun",
+               "jul", "aug", "sept", "oct", "nov", "dec"]
+
+
+def _load_completions(cursor: sqlite3.Cursor, task_ids: Optional[List[str]] = None) -> Dict[str, Completion]:
+    """
+    Fetch completion status (includes three stages for daily tasks), for
+    all tasks or only task_ids. Completion records answer .get(stage) like
+    the {stage: 0|1} dicts they replace.
+    """
+    sql = """
+        SELECT task_id, completed, first_read, notes, revision 
+        FROM task_completions
+    """
+    if task_ids is None:
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+    else:
+        rows = []
+        # Stay under SQLite's bound-parameter limit
+        for i in range(0, len(task_ids), 500):
+            chunk = task_ids[i:i + 500]
+            cursor.execute(f"{sql} WHERE task_id IN ({', '.join('?' for _ in chunk)})", chunk)
+            rows.extend(cursor.fetchall())
+    return {row[0]: Completion(*row) for row in rows}
+
+
 def get_cached_tables() -> Dict[str, List[List[str]]]:
     """
     Read cached data from SQLite and return both tables.
@@ -280,36 +639,22 @@ def get_cached_tables() -> Dict[str, List[List[str]]]:
     daily_rows = []
     
     try:
+        decode = row_codec.decode
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # Fetch completion status (includes three stages for daily tasks)
-            cursor.execute("""
-                SELECT task_id, completed, first_read, notes, revision 
-                FROM task_completions
-            """)
-            completions = {
-                row[0]: {
-                    'completed': row[1],
-                    'first_read': row[2],
-                    'notes': row[3],
-                    'revision': row[4]
-                } for row in cursor.fetchall()
-            }
-            
-            # Fetch monthly data
-            cursor.execute("SELECT row_data FROM monthly_schedule ORDER BY id")
-            monthly_rows = [json.loads(row[0]) for row in cursor.fetchall()]
-            
-            # Merge completion status for monthly tasks
-            monthly_rows = _merge_completion_status(monthly_rows, completions, "monthly")
-            
-            # Fetch daily data
-            cursor.execute("SELECT row_data FROM daily_schedule ORDER BY id")
-            daily_rows = [json.loads(row[0]) for row in cursor.fetchall()]
+            with phase("db_completions"):
+                completions = _load_completions(cursor)
             
-            # Merge completion status for daily tasks
-            daily_rows = _merge_completion_status(daily_rows, completions, "daily")
+            # Decode and merge straight off the cursor (no intermediate row lists)
+            with phase("db_read"):
+                cursor.execute("SELECT row_data FROM monthly_schedule ORDER BY id")
+                monthly_rows = list(_iter_merged(
+                    (decode(row[0]) for row in cursor), completions, "monthly"))
+                
+                cursor.execute("SELECT row_data FROM daily_schedule ORDER BY id")
+                daily_rows = list(_iter_merged(
+                    (decode(row[0]) for row in cursor), completions, "daily"))
             
     except Exception as e:
         # If there's any error, return empty lists
@@ -321,82 +666,192 @@ def get_cached_tables() -> Dict[str, List[List[str]]]:
     }
 
 
-def _merge_completion_status(rows: List[List[Any]], completions: Dict[str, Dict], task_type: str) -> List[List[Any]]:
+def get_completions(task_ids: Optional[List[str]] = None) -> Dict[str, Completion]:
     """
-    Merge local completion status with sheet data.
-    For daily tasks: Adds first_read, notes, revision columns
-    For monthly tasks: Updates Status column based on completed field
+    Return the task_completions table as {task_id: Completion}, or just
+    the rows for task_ids.
+    """
+    init_db()
+    with get_db_connection() as conn:
+        return _load_completions(conn.cursor(), task_ids)
+
+
+def iter_rows(name: str, completions: Optional[Dict[str, Dict]] = None, **filters: Any) -> Iterator[List[Any]]:
+    """
+    Merged rows of one table (header first) straight from the cursor; the
+    lazy counterpart of get_cached_tables()[name]. filters as for iter_table.
+    """
+    for _, row in iter_table(name, completions, **filters):
+        yield row
+
+
+def _month_date_prefix(month_year: str) -> Optional[str]:
+    """'oct_2025' -> '2025-10', or None if the key is not recognised."""
+    month, _, year = (month_year or "").lower().partition("_")
+    if month == "sep":
+        month = "sept"
+    if month not in _MONTH_KEYS or not year.isdigit():
+        return None
+    return f"{int(year):04d}-{_MONTH_KEYS.index(month) + 1:02d}"
+
+
+def iter_table(
+    name: str,
+    completions: Optional[Dict[str, Dict]] = None,
+    after_id: int = 0,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    month_year: Optional[str] = None,
+    batch_size: int = 500,
+) -> Iterator[Tuple[int, List[Any]]]:
+    """
+    Stream one cached table as (row_id, row) pairs with completion status
+    merged in. The (merged) header row is always yielded first with its own
+    row id; data rows follow in id order, starting after after_id.
+
+    Filters:
+      date_from / date_to  inclusive yyyy-mm-dd bounds (daily only, indexed)
+      month_year           'oct_2025'; Monthly matches its month_year column,
+                           daily matches Date within that month
+    Rows are read in keyset batches (id > last id, LIMIT batch_size), so
+    memory stays bounded by batch_size regardless of table size. Each batch
+    query is read to the end before anything is yielded: an unfinished
+    SELECT holds a SHARED lock (rollback journal), and a slow consumer
+    would otherwise block mark_task_stage() and refresh_cache(). Rows
+    inserted after the first batch (a refresh) are not included.
+    """
+    sql_table, task_type = TABLES[name]
+    init_db()
+    if completions is None:
+        completions = get_completions()
+
+    with get_db_connection() as conn:
+        first = conn.execute(f"SELECT id, row_data FROM {sql_table} ORDER BY id LIMIT 1").fetchall()
+        if not first:
+            return
+        max_id = conn.execute(f"SELECT MAX(id) FROM {sql_table}").fetchall()[0][0]
+
+        decode = row_codec.decode
+        header_id, header = first[0][0], decode(first[0][1])
+        new_header, merge = _completion_merger(header, completions, task_type)
+        yield header_id, new_header
+
+        where = ["id > ?", "id <= ?"]
+        params: List[Any] = [max_id]
+        month_idx = None
+        if task_type == "daily":
+            if date_from:
+                where.append("date >= ?")
+                params.append(date_from)
+            if date_to:
+                where.append("date <= ?")
+                params.append(date_to)
+            if month_year:
+                prefix = _month_date_prefix(month_year)
+                where.append("date LIKE ?")
+                params.append(f"{prefix}-%" if prefix else "")
+        elif month_year and "month_year" in header:
+            month_idx = header.index("month_year")
+            month_year = month_year.lower()
+
+        sql = f"SELECT id, row_data FROM {sql_table} WHERE {' AND '.join(where)} ORDER BY id LIMIT ?"
+        last_id = max(after_id, header_id)
+        while True:
+            batch = conn.execute(sql, [last_id, *params, batch_size]).fetchall()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            for row_id, row_data in batch:
+                row = decode(row_data)
+                if month_idx is not None:
+                    if month_idx >= len(row) or str(row[month_idx]).lower() != month_year:
+                        continue
+                yield row_id, merge(row)
+
+
+def _completion_merger(header: List[Any], completions: Dict[str, Dict], task_type: str):
+    """
+    Return (new_header, merge_row) for one table. merge_row(row) applies local
+    completion status to row in place and returns it, so only pass rows you
+    own (e.g. fresh from json.loads). Rows that need no change are untouched.
     """
-    if not rows:
-        return rows
-    
-    # Check if we have a header row
-    header = rows[0]
     try:
         id_idx = header.index("id")
         status_idx = header.index("Status") if "Status" in header else None
     except (ValueError, AttributeError):
-        return rows
+        return header, lambda row: row
     
     # For daily tasks, add three-stage columns to header
     if task_type == "daily":
         new_header = list(header)
         if "first_read" not in new_header:
             new_header.extend(["first_read", "notes", "revision"])
-        result = [new_header]
     else:
-        result = [header]
+        new_header = header
+    header_len = len(header)
     
-    for row in rows[1:]:
-        new_row = list(row)
-        if id_idx < len(new_row):
-            task_id = f"{task_type}_{new_row[id_idx]}"
-            
-            if task_type == "daily":
-                # For daily tasks: add three-stage completion data
-                completion_data = completions.get(task_id, {
-                    'first_read': 0,
-                    'notes': 0,
-                    'revision': 0
-                })
-                
-                # Extend row with three-stage data
-                if len(new_row) == len(header):
-                    new_row.extend([
-                        completion_data.get('first_read', 0),
-                        completion_data.get('notes', 0),
-                        completion_data.get('revision', 0)
-                    ])
-                
-                # Update Status based on completion (all three stages done = done)
-                if status_idx is not None and status_idx < len(new_row):
-                    if (completion_data.get('first_read', 0) == 1 and 
-                        completion_data.get('notes', 0) == 1 and 
-                        completion_data.get('revision', 0) == 1):
-                        new_row[status_idx] = "done"
-                    else:
-                        new_row[status_idx] = "Pending"
-            else:
-                # For monthly tasks: use single completed field
-                if task_id in completions and completions[task_id].get('completed') == 1:
-                    # Task is completed locally - mark as done
-                    if status_idx is not None and status_idx < len(new_row):
-                        new_row[status_idx] = "done"
-                    elif status_idx is None:
-                        # If Status column doesn't exist, add it
-                        if len(header) == len(new_row):
-                            new_row.append("done")
-                else:
-                    # Task is NOT in completions or is marked as incomplete
-                    if status_idx is not None and status_idx < len(new_row):
-                        if task_id not in completions:
-                            original_status = str(new_row[status_idx]).lower().strip()
-                            if original_status in ["done", "completed", "finished", "1", "true"]:
-                                new_row[status_idx] = "Pending"
-            
-        result.append(new_row)
+    def merge_daily(row: List[Any]) -> List[Any]:
+        if id_idx >= len(row):
+            return row
+        stages = completions.get(f"daily_{row[id_idx]}", NO_COMPLETION)
+        first_read = stages.get('first_read', 0)
+        notes = stages.get('notes', 0)
+        revision = stages.get('revision', 0)
+        
+        # Extend row with three-stage data
+        if len(row) == header_len:
+            row.extend((first_read, notes, revision))
+        
+        # Update Status based on completion (all three stages done = done)
+        if status_idx is not None and status_idx < len(row):
+            row[status_idx] = "done" if first_read == 1 and notes == 1 and revision == 1 else "Pending"
+        return row
     
-    return result
+    def merge_monthly(row: List[Any]) -> List[Any]:
+        if id_idx >= len(row):
+            return row
+        task_id = f"monthly_{row[id_idx]}"
+        completion = completions.get(task_id)
+        if completion is not None and completion.get('completed') == 1:
+            # Task is completed locally - mark as done
+            if status_idx is not None and status_idx < len(row):
+                row[status_idx] = "done"
+            elif status_idx is None and len(row) == header_len:
+                # If Status column doesn't exist, add it
+                row.append("done")
+        elif completion is None and status_idx is not None and status_idx < len(row):
+            # Not completed locally: don't trust a "done" from the sheet
+            if str(row[status_idx]).lower().strip() in DONE_STATUSES:
+                row[status_idx] = "Pending"
+        return row
+    
+    return new_header, merge_daily if task_type == "daily" else merge_monthly
+
+
+def _iter_merged(rows: Iterable[List[Any]], completions: Dict[str, Dict], task_type: str) -> Iterator[List[Any]]:
+    """
+    Lazily merge completion status into a header + data row stream
+    (see _completion_merger). Rows are updated in place.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return
+    new_header, merge_row = _completion_merger(header, completions, task_type)
+    yield new_header
+    for row in rows:
+        yield merge_row(row)
+
+
+def _merge_completion_status(rows: List[List[Any]], completions: Dict[str, Dict], task_type: str) -> List[List[Any]]:
+    """
+    Merge local completion status with sheet data.
+    For daily tasks: Adds first_read, notes, revision columns
+    For monthly tasks: Updates Status column based on completed field
+    Returns new rows; the caller's rows are left as they were (the internal
+    readers use _iter_merged, which updates rows they own in place).
+    """
+    return list(_iter_merged((list(row) for row in rows), completions, task_type))
 
 
 def mark_task_complete(task_id: str, task_type: str, completed: bool = True, month_year: str = None) -> bool:
@@ -406,7 +861,7 @@ def mark_task_complete(task_id: str, task_type: str, completed: bool = True, mon
     """
     init_db()
     
-    try:
+    def write() -> bool:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             completed_at = datetime.now(IST).isoformat()
@@ -423,8 +878,12 @@ def mark_task_complete(task_id: str, task_type: str, completed: bool = True, mon
                     DELETE FROM task_completions WHERE task_id = ?
                 """, (task_id,))
             
+            _bump_data_version(cursor)
             conn.commit()
             return True
+
+    try:
+        return _with_busy_retry(write)
     except Exception as e:
         print(f"Error marking task complete: {e}")
         return False
@@ -442,7 +901,7 @@ def mark_task_stage(task_id: str, task_type: str, stage: str, completed: bool =
         print(f"Invalid stage: {stage}")
         return False
     
-    try:
+    def write() -> bool:
         with get_db_connection() as conn:
             cursor = conn.cursor()
             completed_at = datetime.now(IST).isoformat()
@@ -474,8 +933,12 @@ def mark_task_stage(task_id: str, task_type: str, stage: str, completed: bool =
                 """, (task_id, task_type, stages['first_read'], stages['notes'], 
                       stages['revision'], completed_at, month_year))
             
+            _bump_data_version(cursor)
             conn.commit()
             return True
+
+    try:
+        return _with_busy_retry(write)
     except Exception as e:
         print(f"Error marking task stage: {e}")
         return False
@@ -550,24 +1013,28 @@ def get_task_progress(date: str = None) -> Dict[str, Any]:
             
             # Get completed stages
             if date:
-                cursor.execute("""
-                    SELECT SUM(first_read) + SUM(notes) + SUM(revision) 
-                    FROM task_completions tc
-                    WHERE tc.task_type = 'daily'
-                    AND tc.task_id IN (
-                        SELECT 'daily_' || json_extract(row_data, '$[0]')
-                        FROM daily_schedule
-                        WHERE date = ?
-                    )
-                """, (date,))
+                # Task ids are the first column of the day's rows; row_data may
+                # be binary (row_codec), so they are read here, not in SQL
+                cursor.execute("SELECT row_data FROM daily_schedule WHERE date = ?", (date,))
+                rows = [row_codec.decode(r[0]) for r in cursor.fetchall()]
+                task_ids = [f"daily_{row[0]}" for row in rows if row]
+                completed_stages = 0
+                for i in range(0, len(task_ids), 500):
+                    chunk = task_ids[i:i + 500]
+                    cursor.execute(f"""
+                        SELECT SUM(first_read) + SUM(notes) + SUM(revision) 
+                        FROM task_completions
+                        WHERE task_type = 'daily'
+                        AND task_id IN ({', '.join('?' for _ in chunk)})
+                    """, chunk)
+                    completed_stages += cursor.fetchone()[0] or 0
             else:
                 cursor.execute("""
                     SELECT SUM(first_read) + SUM(notes) + SUM(revision) 
                     FROM task_completions 
                     WHERE task_type = 'daily'
                 """)
-            
-            completed_stages = cursor.fetchone()[0] or 0
+                completed_stages = cursor.fetchone()[0] or 0
             
             # Calculate percentage
             percentage = (completed_stages / total_stages * 100) if total_stages > 0 else 0
@@ -591,7 +1058,7 @@ def get_task_progress(date: str = None) -> Dict[str, Any]:
 # ------------ CLI Support (optional) ------------
 if __name__ == "__main__":
     try:
-        ts = refresh_cache()
+        ts = refresh_cache(source="cli")
         print(f"Cache updated at {ts}")
     except Exception as e:
         print(f"ERROR: {e}")
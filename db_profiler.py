@@ -0,0 +1,182 @@
+# db_profiler.py
+"""
+Opt-in SQLite query profiler (DB_PROFILE=1).
+
+db_cache opens its connections with ProfilingConnection when enabled.
+Every statement is timed from execute() through its last fetch, with the
+number of rows returned (or changed). Per-statement totals are kept for
+/admin/db-queries; statements slower than DB_SLOW_QUERY_MS are printed with
+their EXPLAIN QUERY PLAN so full scans show up in the logs.
+
+Numbers are per worker process. With DB_PROFILE unset nothing here runs.
+"""
+import os
+import re
+import time
+import json
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+# ------------ Configuration ------------
+ENABLED = os.getenv("DB_PROFILE", "0") == "1"
+SLOW_MS = float(os.getenv("DB_SLOW_QUERY_MS", "50"))
+
+# Distinct statements tracked per worker
+MAX_STATEMENTS = 500
+
+_WS = re.compile(r"\s+")
+
+# normalized sql -> totals
+_stats: Dict[str, Dict[str, Any]] = {}
+
+
+def _normalize(sql: str) -> str:
+    return _WS.sub(" ", sql).strip()
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params: Any) -> Optional[List[str]]:
+    """EXPLAIN QUERY PLAN lines for sql, or None if it can't be explained."""
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error:
+        return None
+    return [row[3] for row in rows]
+
+
+def _record(conn: sqlite3.Connection, sql: str, params: Any, ms: float, rows: int) -> None:
+    key = _normalize(sql)
+    entry = _stats.get(key)
+    if entry is None:
+        if len(_stats) >= MAX_STATEMENTS:
+            return
+        entry = _stats[key] = {
+            "sql": key, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "rows": 0, "slow": 0, "plan": None,
+        }
+    entry["count"] += 1
+    entry["total_ms"] += ms
+    entry["max_ms"] = max(entry["max_ms"], ms)
+    entry["rows"] += rows
+
+    if ms >= SLOW_MS:
+        entry["slow"] += 1
+        if entry["plan"] is None:
+            entry["plan"] = _explain(conn, sql, params)
+        print("[db slow query] " + json.dumps({
+            "ms": round(ms, 2),
+            "rows": rows,
+            "sql": key,
+            "plan": entry["plan"],
+            "pid": os.getpid(),
+        }))
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Times each statement from execute() to its last fetch."""
+
+    def _finish(self) -> None:
+        sql = getattr(self, "_sql", None)
+        if sql is None:
+            return
+        self._sql = None
+        rows = self._rows if self._fetched else max(self.rowcount, 0)
+        _record(self.connection, sql, self._params, self._ms, rows)
+
+    def _start(self, sql: str, params: Any) -> None:
+        self._finish()
+        self._sql, self._params = sql, params
+        self._ms, self._rows, self._fetched = 0.0, 0, False
+
+    def _timed(self, call, *args):
+        t0 = time.perf_counter()
+        try:
+            return call(*args)
+        finally:
+            if getattr(self, "_sql", None) is not None:
+                self._ms += (time.perf_counter() - t0) * 1000
+
+    def execute(self, sql, params=()):
+        self._start(sql, params)
+        return self._timed(super().execute, sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._start(sql, ())
+        return self._timed(super().executemany, sql, seq_of_params)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        self._fetched = True
+        if row is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        self._fetched = True
+        self._rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        self._fetched = True
+        self._rows += len(rows)
+        return rows
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        self._fetched = True
+        self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """Hands out ProfilingCursors and flushes their timings on close."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cursors: List[ProfilingCursor] = []
+
+    def cursor(self, factory=ProfilingCursor):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, ProfilingCursor):
+            self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def close(self):
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors = []
+        super().close()
+
+
+def connect(path: str, **kwargs) -> sqlite3.Connection:
+    """sqlite3.connect, profiled when DB_PROFILE=1."""
+    if ENABLED:
+        kwargs["factory"] = ProfilingConnection
+    return sqlite3.connect(path, **kwargs)
+
+
+def top(n: int = 20, sort: str = "max_ms") -> List[Dict[str, Any]]:
+    """The n worst statements by max_ms, total_ms or count."""
+    if sort not in ("max_ms", "total_ms", "count", "slow"):
+        sort = "max_ms"
+    entries = sorted(_stats.values(), key=lambda e: e[sort], reverse=True)[:n]
+    return [
+        dict(e, total_ms=round(e["total_ms"], 2), max_ms=round(e["max_ms"], 2),
+             avg_ms=round(e["total_ms"] / e["count"], 3))
+        for e in entries
+    ]
+
+
+def reset() -> None:
+    _stats.clear()
@@ -0,0 +1,282 @@
+# llm_cache.py
+import os
+import re
+import time
+import json
+import zlib
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from contextlib import contextmanager
+
+import db_cache
+import metrics
+import singleflight
+
+# ------------ Configuration ------------
+LLM_CACHE_DB_PATH = os.path.join(db_cache.DATA_DIR, "llm_cache.db")
+
+TTL_SECS = int(os.getenv("LLM_CACHE_TTL_HOURS", "24")) * 3600
+
+# In-process LRU tier (per worker)
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_ENTRIES", "256"))
+
+# Disk tier, shared by all workers and kept across restarts
+DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "5000"))
+
+# Hit-rate counters for this worker (see /admin/ai-cache)
+STATS = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0}
+
+_memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+# summarize.py may hit the cache from several threads at once
+_lock = threading.Lock()
+
+
+# ------------ Keys ------------
+_WS = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: Optional[str]) -> str:
+    """Collapse whitespace so trivially different prompts share an entry."""
+    return _WS.sub(" ", (prompt or "").strip())
+
+
+def make_key(mode: str, prompt: Optional[str], model_name: str) -> str:
+    raw = json.dumps([mode, normalize_prompt(prompt), model_name], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ------------ Database Setup ------------
+@contextmanager
+def get_connection():
+    """Context manager for response-cache database connections."""
+    conn = None
+    try:
+        conn = sqlite3.connect(LLM_CACHE_DB_PATH, timeout=10)
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def init_db():
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_llm_responses_access
+            ON llm_responses(last_access)
+        """)
+        conn.commit()
+
+
+# STATS name -> app_cache_lookups_total result label
+_METRIC_RESULTS = {"memory_hits": "memory_hit", "disk_hits": "disk_hit",
+                   "misses": "miss", "bypassed": "bypass"}
+
+
+def _count(name: str) -> None:
+    with _lock:
+        STATS[name] += 1
+        metrics.inc("app_cache_lookups_total", cache="llm", result=_METRIC_RESULTS[name])
+
+
+# ------------ Memory tier ------------
+def _memory_get(key: str, now: float) -> Optional[str]:
+    with _lock:
+        entry = _memory.get(key)
+        if entry is None:
+            return None
+        created_at, text = entry
+        if now - created_at > TTL_SECS:
+            del _memory[key]
+            return None
+        _memory.move_to_end(key)
+        return text
+
+
+def _memory_put(key: str, text: str, created_at: float) -> None:
+    with _lock:
+        _memory[key] = (created_at, text)
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+# ------------ Disk tier ------------
+def _disk_get(key: str, now: float, touch: bool = True) -> Optional[Tuple[float, str]]:
+    """
+    (created_at, text) or None. touch=False is a plain SELECT (no init_db,
+    no write), for callers that poll.
+    """
+    if touch:
+        init_db()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+        )
+        row = cursor.fetchone()
+        if row is None or now - row[1] > TTL_SECS:
+            return None
+        if touch:
+            cursor.execute(
+                "UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            conn.commit()
+    return row[1], zlib.decompress(row[0]).decode("utf-8")
+
+
+def _disk_touch(key: str, now: float) -> None:
+    with get_connection() as conn:
+        conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+        conn.commit()
+
+
+def _disk_put(key: str, text: str, now: float) -> None:
+    init_db()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_access)
+            VALUES (?, ?, ?, ?)
+        """, (key, zlib.compress(text.encode("utf-8")), now, now))
+        cursor.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - TTL_SECS,))
+        cursor.execute("""
+            DELETE FROM llm_responses WHERE key IN (
+                SELECT key FROM llm_responses
+                ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (DISK_ENTRIES,))
+        conn.commit()
+
+
+# ------------ Core Logic ------------
+def get(key: str) -> Optional[str]:
+    """Look a response up in memory, then on disk. Updates STATS."""
+    now = time.time()
+    text = _memory_get(key, now)
+    if text is not None:
+        _count("memory_hits")
+        return text
+
+    try:
+        hit = _disk_get(key, now)
+    except sqlite3.Error as e:
+        print(f"Error reading LLM cache: {e}")
+        hit = None
+    if hit is not None:
+        created_at, text = hit
+        _memory_put(key, text, created_at)
+        _count("disk_hits")
+        return text
+
+    _count("misses")
+    return None
+
+
+def put(key: str, text: str) -> None:
+    now = time.time()
+    _memory_put(key, text, now)
+    try:
+        _disk_put(key, text, now)
+    except sqlite3.Error as e:
+        print(f"Error writing LLM cache: {e}")
+
+
+def get_or_generate(
+    mode: str,
+    prompt: Optional[str],
+    model_name: str,
+    generate: Callable[[], str],
+    bypass: bool = False,
+) -> Tuple[str, bool]:
+    """
+    Return (response_text, cached). On a miss, or when bypass is set,
+    call generate() and store the fresh result. Concurrent misses for the
+    same key on any worker are coalesced into one generate() call.
+    """
+    key, text = lookup(mode, prompt, model_name, bypass)
+    if text is not None:
+        return text, True
+
+    def compute() -> str:
+        fresh = generate()
+        put(key, fresh)
+        return fresh
+
+    if bypass:
+        return compute(), False
+
+    # Identical requests in flight on any worker share one upstream call
+    text, led = singleflight.do(key, lambda: peek(key), compute)
+    if not led:
+        # A real hit on the leader's answer (peek() itself never writes)
+        try:
+            _disk_touch(key, time.time())
+        except sqlite3.Error as e:
+            print(f"Error updating LLM cache: {e}")
+    return text, not led
+
+
+def peek(key: str) -> Optional[str]:
+    """
+    Like get() but without touching the hit counters or LRU order, and
+    read-only on disk: single-flight followers poll it several times a
+    second while the leader is writing.
+    """
+    now = time.time()
+    with _lock:
+        entry = _memory.get(key)
+    if entry is not None and now - entry[0] <= TTL_SECS:
+        return entry[1]
+    try:
+        hit = _disk_get(key, now, touch=False)
+    except sqlite3.Error:
+        return None
+    return hit[1] if hit else None
+
+
+def lookup(
+    mode: str, prompt: Optional[str], model_name: str, bypass: bool = False
+) -> Tuple[str, Optional[str]]:
+    """
+    Return (key, cached_text_or_None). For callers that produce the answer
+    themselves (e.g. streaming) and put() it once complete.
+    """
+    key = make_key(mode, prompt, model_name)
+    if bypass:
+        _count("bypassed")
+        return key, None
+    return key, get(key)
+
+
+def get_stats() -> Dict[str, float]:
+    """Counters for this worker plus hit ratio and tier sizes."""
+    lookups = STATS["memory_hits"] + STATS["disk_hits"] + STATS["misses"]
+    hits = STATS["memory_hits"] + STATS["disk_hits"]
+    out = dict(STATS)
+    out["hit_ratio"] = round(hits / lookups, 4) if lookups else 0.0
+    out["memory_entries"] = len(_memory)
+    out.update(singleflight.STATS)
+    try:
+        init_db()
+        with get_connection() as conn:
+            out["disk_entries"] = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+    except sqlite3.Error:
+        out["disk_entries"] = None
+    return out
+
+
+def clear_memory() -> None:
+    _memory.clear()
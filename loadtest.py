@@ -0,0 +1,295 @@
+# loadtest.py
+"""
+HTTP load test for the schedule routes.
+
+Starts a pre-forked server (like uWSGI: one listening socket shared by
+--workers single-threaded processes) on a synthetic schedule database
+(synth_schedule.py), then drives it with --concurrency simulated users for
+--duration seconds and reports throughput, p50/p95/p99 latency and error
+rate per route.
+
+    python loadtest.py --workers 4 --concurrency 16 --duration 30
+    python loadtest.py --url http://127.0.0.1:5000 --mix browse=1   # existing server
+
+Scenarios (mix weights with --mix):
+  browse   open /daily, step through neighbouring days via /api/daily, check progress
+  toggle   load a day, flip a stage of one of its tasks, re-read progress
+  monthly  open /schedule
+"""
+import os
+import sys
+import gzip
+import json
+import math
+import time
+import random
+import socket
+import argparse
+import tempfile
+import threading
+import http.client
+import multiprocessing
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+STAGES = ("first_read", "notes", "revision")
+DEFAULT_MIX = "browse=6,toggle=3,monthly=1"
+
+
+# ------------ Server ------------
+def _serve(sock: socket.socket, db_path: str, tmp_dir: str) -> None:
+    """One single-threaded worker process on the shared listening socket."""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    import db_cache
+    import metrics
+    db_cache.DB_PATH = db_path
+    metrics.METRICS_DIR = os.path.join(tmp_dir, "metrics")
+
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    host, port = sock.getsockname()[:2]
+    server = make_server(host, port, app, request_handler=QuietHandler, fd=sock.fileno())
+    server.serve_forever()
+
+
+def start_server(workers: int, daily: int, months: int) -> Tuple[str, List[multiprocessing.Process]]:
+    """Seed a throwaway database and fork workers. Returns (base_url, processes)."""
+    import synth_schedule
+
+    tmp_dir = tempfile.mkdtemp(prefix="loadtest-")
+    db_path = os.path.join(tmp_dir, "schedule.db")
+    start = date.today().replace(day=1)
+    payload = synth_schedule.generate(daily, start=start, months=months)
+    synth_schedule.seed_db(payload, synth_schedule.completions(payload, as_of=date.today()), db_path)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(128)
+    port = sock.getsockname()[1]
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_serve, args=(sock, db_path, tmp_dir), daemon=True)
+             for _ in range(workers)]
+    for p in procs:
+        p.start()
+    sock.close()
+    print(f"[loadtest] {workers} workers on http://127.0.0.1:{port} "
+          f"({daily} daily rows, db {db_path})", file=sys.stderr)
+    return f"http://127.0.0.1:{port}", procs
+
+
+# ------------ Client ------------
+class Client:
+    """Tiny HTTP client that records one sample per request."""
+
+    def __init__(self, base_url: str, record: Callable[[str, float, bool], None]):
+        parts = urlsplit(base_url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.record = record
+
+    def request(self, label: str, method: str, path: str, body: Any = None) -> Optional[Any]:
+        headers = {"Accept-Encoding": "gzip"}
+        data = None
+        if body is not None:
+            data = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        t0 = time.perf_counter()
+        ok = False
+        payload = None
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+            conn.request(method, path, body=data, headers=headers)
+            response = conn.getresponse()
+            raw = response.read()
+            ok = response.status < 400
+            if ok and response.getheader("Content-Type", "").startswith("application/json"):
+                if response.getheader("Content-Encoding") == "gzip":
+                    raw = gzip.decompress(raw)
+                payload = json.loads(raw)
+            conn.close()
+        except (OSError, http.client.HTTPException, ValueError):
+            ok = False
+        self.record(label, (time.perf_counter() - t0) * 1000, ok)
+        return payload
+
+
+def load_schedule(base_url: str) -> Dict[str, List[str]]:
+    """{day: [daily task ids]} from the server's own /schedule.json."""
+    client = Client(base_url, lambda *a: None)
+    data = client.request("setup", "GET", "/schedule.json?tables=daily_OCT&fields=id,Date")
+    if not data:
+        raise RuntimeError("Could not read /schedule.json from the server")
+    rows = data["daily_OCT"][1:]
+    days: Dict[str, List[str]] = {}
+    for task_id, day in rows:
+        days.setdefault(str(day)[:10], []).append(str(task_id))
+    return days
+
+
+# ------------ Scenarios ------------
+def browse(client: Client, days: Dict[str, List[str]], rng: random.Random) -> None:
+    day = date.fromisoformat(rng.choice(list(days)))
+    client.request("GET /daily", "GET", f"/daily?d={day.isoformat()}")
+    for _ in range(3):
+        day += timedelta(days=rng.choice((-1, 1)))
+        client.request("GET /api/daily", "GET", f"/api/daily?d={day.isoformat()}")
+    client.request("GET /api/task/progress", "GET", f"/api/task/progress?date={day.isoformat()}")
+
+
+def toggle(client: Client, days: Dict[str, List[str]], rng: random.Random) -> None:
+    day = rng.choice(list(days))
+    client.request("GET /api/daily", "GET", f"/api/daily?d={day}")
+    client.request("POST /api/task/stage", "POST", "/api/task/stage", {
+        "task_id": rng.choice(days[day]),
+        "task_type": "daily",
+        "stage": rng.choice(STAGES),
+        "completed": rng.random() < 0.7,
+    })
+    client.request("GET /api/task/progress", "GET", f"/api/task/progress?date={day}")
+
+
+def monthly(client: Client, days: Dict[str, List[str]], rng: random.Random) -> None:
+    client.request("GET /schedule", "GET", "/schedule")
+
+
+SCENARIOS = {"browse": browse, "toggle": toggle, "monthly": monthly}
+
+
+# ------------ Runner ------------
+def percentile(sorted_ms: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_ms:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_ms)))
+    return sorted_ms[rank - 1]
+
+
+def run(base_url: str, concurrency: int, duration: float, warmup: float,
+        mix: Dict[str, int], seed: int = 1) -> Dict[str, Any]:
+    days = load_schedule(base_url)
+    samples: Dict[str, List[Tuple[float, bool]]] = {}
+    lock = threading.Lock()
+    recording = threading.Event()
+
+    def record(label: str, ms: float, ok: bool) -> None:
+        if recording.is_set():
+            with lock:
+                samples.setdefault(label, []).append((ms, ok))
+
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    stop_at = time.monotonic() + warmup + duration
+
+    def user(n: int) -> None:
+        rng = random.Random(seed * 1000 + n)
+        client = Client(base_url, record)
+        while time.monotonic() < stop_at:
+            SCENARIOS[rng.choices(names, weights)[0]](client, days, rng)
+
+    threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    time.sleep(warmup)
+    recording.set()
+    started = time.monotonic()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - started
+
+    routes = {}
+    all_ms: List[float] = []
+    errors = 0
+    for label, points in sorted(samples.items()):
+        ms = sorted(p[0] for p in points)
+        failed = sum(1 for p in points if not p[1])
+        all_ms.extend(ms)
+        errors += failed
+        routes[label] = _summary(ms, failed, elapsed)
+    all_ms.sort()
+    return {
+        "base_url": base_url,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 2),
+        "mix": mix,
+        "total": _summary(all_ms, errors, elapsed),
+        "routes": routes,
+    }
+
+
+def _summary(sorted_ms: List[float], errors: int, elapsed: float) -> Dict[str, float]:
+    count = len(sorted_ms)
+    return {
+        "requests": count,
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "p50_ms": round(percentile(sorted_ms, 50), 2),
+        "p95_ms": round(percentile(sorted_ms, 95), 2),
+        "p99_ms": round(percentile(sorted_ms, 99), 2),
+        "max_ms": round(sorted_ms[-1], 2) if sorted_ms else 0.0,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n{report['concurrency']} users for {report['duration_s']}s against {report['base_url']}")
+    print(f"{'route':<26} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    rows = list(report["routes"].items()) + [("TOTAL", report["total"])]
+    for label, s in rows:
+        print(f"{label:<26} {s['requests']:>7} {s['rps']:>8} {s['error_rate'] * 100:>5.1f}% "
+              f"{s['p50_ms']:>7.1f}ms {s['p95_ms']:>7.1f}ms {s['p99_ms']:>7.1f}ms {s['max_ms']:>7.1f}ms")
+
+
+def _parse_mix(text: str) -> Dict[str, int]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the schedule routes")
+    parser.add_argument("--url", help="test this running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=4, help="server processes to start")
+    parser.add_argument("--daily", type=int, default=2000, help="synthetic daily rows")
+    parser.add_argument("--months", type=int, default=3, help="months of synthetic schedule")
+    parser.add_argument("--concurrency", type=int, default=8, help="simulated users")
+    parser.add_argument("--duration", type=float, default=20, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="unmeasured seconds first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario weights, e.g. browse=6,toggle=3")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    procs: List[multiprocessing.Process] = []
+    base_url = args.url
+    if not base_url:
+        base_url, procs = start_server(args.workers, args.daily, args.months)
+    try:
+        report = run(base_url, args.concurrency, args.duration, args.warmup,
+                     _parse_mix(args.mix), args.seed)
+    finally:
+        for p in procs:
+            p.terminate()
+
+    report["workers"] = None if args.url else args.workers
+    print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[loadtest] wrote {args.out}", file=sys.stderr)
+    return 1 if report["total"]["error_rate"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+# metrics.py
+"""
+Counters and latency histograms in Prometheus text format.
+
+Each process (uWSGI worker, ask_worker.py) keeps its metrics in memory and
+writes them to its own JSON file under data_cache/metrics/ (named by pid
+and process start, so a reused pid never overwrites a dead worker's
+file) at most every
+METRICS_FLUSH_SECS - piggybacking on requests, no threads. /admin/metrics
+sums all files, so the numbers cover every worker. Once a worker's pid is
+gone, its numbers are folded into _exited.json and its file removed, so
+totals never go backwards.
+"""
+import os
+import json
+import time
+import atexit
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (Windows): files of exited workers are simply kept
+    fcntl = None
+
+# ------------ Configuration ------------
+# Same data_cache directory as db_cache.DATA_DIR (db_cache imports this module)
+METRICS_DIR = os.path.join(os.path.dirname(__file__), "data_cache", "metrics")
+
+FLUSH_SECS = float(os.getenv("METRICS_FLUSH_SECS", "10"))
+
+# Running totals of every worker that has exited
+EXITED_FILE = "_exited.json"
+
+# Seconds; suits both page renders and LLM calls
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "app_requests_total": ("counter", "HTTP requests by route, method and status"),
+    "app_request_duration_seconds": ("histogram", "Time to response headers by route"),
+    "app_refresh_total": ("counter", "Sheet refreshes by outcome"),
+    "app_refresh_duration_seconds": ("histogram", "Sheet refresh duration"),
+    "app_cache_lookups_total": ("counter", "Cache lookups by cache and result"),
+    "app_sqlite_busy_retries_total": ("counter", "Writes retried because SQLite was locked"),
+    "app_ask_upstream_duration_seconds": ("histogram", "LLM call duration by provider and call type"),
+    "app_ask_rejected_total": ("counter", "/api/ask requests shed by admission control"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# name -> labels -> value
+_counters: Dict[str, Dict[LabelKey, float]] = {}
+# name -> labels -> [bucket counts..., +Inf count, sum]
+_histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+_last_flush = 0.0
+# (pid, start ms) naming this process's file; reset when a fork changes the pid
+_file_owner = (0, 0)
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+# ------------ Recording ------------
+def inc(name: str, amount: float = 1, **labels: Any) -> None:
+    series = _counters.setdefault(name, {})
+    key = _labels(labels)
+    series[key] = series.get(key, 0) + amount
+
+
+def observe(name: str, seconds: float, **labels: Any) -> None:
+    series = _histograms.setdefault(name, {})
+    key = _labels(labels)
+    values = series.get(key)
+    if values is None:
+        values = series[key] = [0.0] * (len(DEFAULT_BUCKETS) + 2)
+    for i, bound in enumerate(DEFAULT_BUCKETS):
+        if seconds <= bound:
+            values[i] += 1
+    values[-2] += 1          # +Inf / count
+    values[-1] += seconds    # sum
+
+
+# ------------ Per-process files ------------
+def _path() -> str:
+    global _file_owner
+    pid = os.getpid()
+    if _file_owner[0] != pid:
+        _file_owner = (pid, int(time.time() * 1000))
+    return os.path.join(METRICS_DIR, f"{pid}-{_file_owner[1]}.json")
+
+
+def _dump(series: Dict[str, Dict[LabelKey, Any]]) -> Dict[str, List]:
+    return {name: [[list(map(list, key)), value] for key, value in values.items()]
+            for name, values in series.items()}
+
+
+def _write(path: str, counters, histograms) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"counters": _dump(counters), "histograms": _dump(histograms)}, f)
+    os.replace(tmp, path)
+
+
+def flush() -> None:
+    """Write this process's metrics to its file (atomically)."""
+    global _last_flush
+    _last_flush = time.time()
+    if not _counters and not _histograms:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    try:
+        _write(_path(), _counters, _histograms)
+    except OSError as e:
+        print(f"Error writing metrics: {e}")
+
+
+def maybe_flush() -> None:
+    """Flush if the last flush is older than FLUSH_SECS. Call this often."""
+    if time.time() - _last_flush >= FLUSH_SECS:
+        flush()
+
+
+atexit.register(flush)
+
+
+def _add(counters, histograms, data: Dict[str, Any]) -> None:
+    """Add one metrics file's contents to the running sums."""
+    for metric, series in data.get("counters", {}).items():
+        target = counters.setdefault(metric, {})
+        for key, value in series:
+            key = tuple(map(tuple, key))
+            target[key] = target.get(key, 0) + value
+    for metric, series in data.get("histograms", {}).items():
+        target = histograms.setdefault(metric, {})
+        for key, values in series:
+            key = tuple(map(tuple, key))
+            current = target.get(key)
+            if current is None or len(current) != len(values):
+                target[key] = list(values)
+            else:
+                target[key] = [a + b for a, b in zip(current, values)]
+
+
+def _file_pid(name: str) -> Optional[int]:
+    """pid from "<pid>-<start ms>.json" (or an older "<pid>.json")."""
+    try:
+        return int(name[:-len(".json")].split("-")[0])
+    except ValueError:
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # EPERM: it exists, it just isn't ours
+        return True
+    return True
+
+
+@contextmanager
+def _dir_lock():
+    """Serialise collect() across workers. Yields False if there is no flock."""
+    if fcntl is None:
+        yield False
+        return
+    with open(os.path.join(METRICS_DIR, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _sum_files(can_reap: bool):
+    counters: Dict[str, Dict[LabelKey, float]] = {}
+    histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+    exited_path = os.path.join(METRICS_DIR, EXITED_FILE)
+    exited = {}
+    if os.path.exists(exited_path):
+        try:
+            with open(exited_path) as f:
+                exited = json.load(f)
+        except (OSError, ValueError) as e:
+            # Don't overwrite totals we couldn't read
+            print(f"Error reading {EXITED_FILE}: {e}")
+            can_reap = False
+    _add(counters, histograms, exited)
+
+    dead = []
+    for name in os.listdir(METRICS_DIR):
+        if not name.endswith(".json") or name == EXITED_FILE:
+            continue
+        path = os.path.join(METRICS_DIR, name)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        _add(counters, histograms, data)
+        pid = _file_pid(name)
+        if can_reap and pid is not None and not _pid_alive(pid):
+            dead.append((path, data))
+
+    if dead:
+        exited_counters: Dict[str, Dict[LabelKey, float]] = {}
+        exited_histograms: Dict[str, Dict[LabelKey, List[float]]] = {}
+        for data in [exited] + [data for _, data in dead]:
+            _add(exited_counters, exited_histograms, data)
+        try:
+            _write(exited_path, exited_counters, exited_histograms)
+            for path, _ in dead:
+                os.remove(path)
+        except OSError as e:
+            print(f"Error folding exited workers' metrics: {e}")
+    return counters, histograms
+
+
+def collect() -> Tuple[Dict[str, Dict[LabelKey, float]], Dict[str, Dict[LabelKey, List[float]]]]:
+    """
+    Sum the metrics files of all processes (this one is flushed first).
+    Files of workers whose pid is gone are folded into EXITED_FILE on the
+    way; an idle but live worker keeps its file however old it is.
+    """
+    flush()
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        with _dir_lock() as can_reap:
+            return _sum_files(can_reap)
+    except OSError as e:
+        print(f"Error reading metrics: {e}")
+        return {}, {}
+
+
+# ------------ Exposition ------------
+def _fmt_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(round(value, 6))
+
+
+def render(gauges: Dict[str, float] = None) -> str:
+    """All metrics (every process) in Prometheus text exposition format."""
+    counters, histograms = collect()
+    lines: List[str] = []
+
+    def header(name: str, default_type: str) -> None:
+        kind, text = HELP.get(name, (default_type, name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    for name in sorted(counters):
+        header(name, "counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+
+    for name in sorted(histograms):
+        header(name, "histogram")
+        for key, values in sorted(histograms[name].items()):
+            for bound, count in zip(DEFAULT_BUCKETS, values):
+                lines.append(f"{name}_bucket{_fmt_labels(key, (('le', str(bound)),))} {_fmt_value(count)}")
+            lines.append(f"{name}_bucket{_fmt_labels(key, (('le', '+Inf'),))} {_fmt_value(values[-2])}")
+            lines.append(f"{name}_sum{_fmt_labels(key)} {_fmt_value(values[-1])}")
+            lines.append(f"{name}_count{_fmt_labels(key)} {_fmt_value(values[-2])}")
+
+    for name, value in sorted((gauges or {}).items()):
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_fmt_value(value)}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,122 @@
+"""
+Database migration script to re-encode cached schedule rows.
+Rewrites row_data of monthly_schedule and daily_schedule with another row
+codec (see row_codec.py) and vacuums the file so the space is returned.
+
+    python migrate_row_codec.py                  # to ROW_CODEC from .env / environment
+    python migrate_row_codec.py --codec packed
+    python migrate_row_codec.py --codec json     # back to plain JSON text
+
+Set ROW_CODEC to the same codec afterwards, or the next refresh writes the
+old one again. Reading works either way: every row says how it is encoded.
+"""
+
+import sys
+import os
+import shutil
+import argparse
+sys.path.insert(0, os.path.dirname(__file__))
+
+import sqlite3
+from datetime import datetime
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import db_cache
+import row_codec
+
+
+def migrate_database(codec=None, db_path=None):
+    """
+    Re-encode every cached schedule row with codec (default ROW_CODEC).
+    Returns True on success.
+    """
+    db_path = db_path or db_cache.DB_PATH
+    print("="*60)
+    print(f"DATABASE MIGRATION: Row codec -> {codec or row_codec.configured()}")
+    print("="*60)
+
+    if not os.path.exists(db_path):
+        print(f"\n✗ Database not found at: {db_path}")
+        print("Please run refresh_cache.py first to create the database.")
+        return False
+
+    try:
+        to_codec = row_codec.reencoder(codec)
+    except ValueError as e:
+        print(f"\n✗ {e}")
+        return False
+
+    print(f"\n✓ Database found: {db_path}")
+    size_before = os.path.getsize(db_path)
+
+    # Backup the database first
+    backup_path = db_path + f".backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    print(f"\n1. Creating backup: {backup_path}")
+    try:
+        shutil.copy2(db_path, backup_path)
+        print("   ✓ Backup created successfully")
+    except Exception as e:
+        print(f"   ✗ Backup failed: {e}")
+        print("   Migration aborted for safety.")
+        return False
+
+    print("\n2. Re-encoding rows...")
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    cursor = conn.cursor()
+    decoded = {}
+    try:
+        # Hold the write lock so a refresh can't interleave
+        cursor.execute("BEGIN IMMEDIATE")
+        for table in ("monthly_schedule", "daily_schedule"):
+            cursor.execute(f"SELECT id, row_data FROM {table}")
+            rows = cursor.fetchall()
+            updates = []
+            for row_id, value in rows:
+                decoded[(table, row_id)] = row_codec.decode(value)
+                new_value = to_codec(value)
+                if new_value != value:
+                    updates.append((new_value, row_id))
+            cursor.executemany(f"UPDATE {table} SET row_data = ? WHERE id = ?", updates)
+            print(f"   ✓ {table}: {len(updates)} of {len(rows)} rows re-encoded")
+        cursor.execute("COMMIT")
+        print("\n   ✓ Migration committed to database")
+    except Exception as e:
+        print(f"\n   ✗ Migration failed: {e}")
+        print("   Rolling back changes...")
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        print(f"   Database unchanged. Backup available at: {backup_path}")
+        conn.close()
+        return False
+
+    # Verify migration
+    print("\n3. Verifying migration...")
+    for table in ("monthly_schedule", "daily_schedule"):
+        cursor.execute(f"SELECT id, row_data FROM {table}")
+        for row_id, value in cursor.fetchall():
+            if row_codec.decode(value) != decoded.get((table, row_id)) or to_codec(value) != value:
+                print(f"   ✗ {table} row {row_id} does not match. Restore from {backup_path}")
+                conn.close()
+                return False
+    print(f"   ✓ All {len(decoded)} rows decode to the same data")
+
+    print("\n4. Reclaiming space (VACUUM)...")
+    cursor.execute("VACUUM")
+    conn.close()
+    size_after = os.path.getsize(db_path)
+    print(f"   ✓ {size_before:,} -> {size_after:,} bytes")
+
+    print("\n✅ MIGRATION COMPLETED SUCCESSFULLY!")
+    print(f"   • Backup saved at: {backup_path}")
+    print(f"   • Set ROW_CODEC={codec or row_codec.configured()} so refreshes keep this codec")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-encode cached schedule rows")
+    parser.add_argument("--codec", help=f"one of {', '.join(row_codec.available())} (default: ROW_CODEC)")
+    parser.add_argument("--db", help="database path (default: data_cache/schedule.db)")
+    args = parser.parse_args()
+    sys.exit(0 if migrate_database(args.codec, args.db) else 1)
@@ -0,0 +1,198 @@
+# providers.py
+"""
+Pluggable back ends for /api/ask.
+
+LLMProvider turns a prompt into text (whole or streamed in chunks) and
+TranscriptProvider returns a YouTube transcript as a list of
+{"text", "start", "duration"} dicts. The real ones wrap Gemini and
+youtube_transcript_api; the fakes are offline and deterministic with
+configurable latency, chunking and payload size, so caching, streaming and
+admission control can be load-tested without network access.
+
+Chosen with LLM_PROVIDER=gemini|fake and TRANSCRIPT_PROVIDER=youtube|fake.
+"""
+import os
+import time
+import hashlib
+from typing import Any, Dict, Iterator, List, Tuple
+
+# (phase, ms) for lazily initialised clients; shown in /admin/startup
+INIT_PHASES: List[Tuple[str, float]] = []
+
+
+# ------------ Interfaces ------------
+class LLMProvider:
+    model_name = "unknown"
+
+    def warm(self) -> None:
+        """Do any slow client setup now instead of on the first request."""
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Yield the answer in chunks. Closing the iterator stops generation."""
+        yield self.generate(prompt)
+
+
+class TranscriptProvider:
+    def warm(self) -> None:
+        pass
+
+    def fetch(self, video_id: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+# ------------ Real providers ------------
+class GeminiProvider(LLMProvider):
+    def __init__(self, model_name: str = "gemini-2.0-flash"):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        """Import and configure google.generativeai on first use."""
+        if self._model is None:
+            t0 = time.perf_counter()
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv("GEMINI_API"))
+            self._model = genai.GenerativeModel(self.model_name)
+            INIT_PHASES.append(("lazy: google.generativeai", round((time.perf_counter() - t0) * 1000, 2)))
+        return self._model
+
+    def warm(self) -> None:
+        self.model
+
+    def generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        upstream = self.model.generate_content(prompt, stream=True)
+        try:
+            for chunk in upstream:
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            # Stop pulling from Gemini if the consumer went away
+            close = getattr(upstream, "close", None)
+            if close:
+                close()
+
+
+class YouTubeTranscriptProvider(TranscriptProvider):
+    def __init__(self):
+        self._api = None
+
+    @property
+    def api(self):
+        if self._api is None:
+            t0 = time.perf_counter()
+            from youtube_transcript_api import YouTubeTranscriptApi
+            self._api = YouTubeTranscriptApi
+            INIT_PHASES.append(("lazy: youtube_transcript_api", round((time.perf_counter() - t0) * 1000, 2)))
+        return self._api
+
+    def warm(self) -> None:
+        self.api
+
+    def fetch(self, video_id: str) -> List[Dict[str, Any]]:
+        return self.api.get_transcript(video_id)
+
+
+# ------------ Offline fakes ------------
+_WORDS = ("lecture", "notes", "topic", "summary", "key", "fact", "history",
+          "policy", "economy", "science", "example", "definition", "revision")
+
+
+def _fake_text(seed: str, chars: int) -> str:
+    """Deterministic pseudo-text of about chars characters for seed."""
+    digest = hashlib.sha256(seed.encode("utf-8")).digest()
+    words = []
+    size = 0
+    i = 0
+    while size < chars:
+        word = _WORDS[digest[i % len(digest)] % len(_WORDS)]
+        words.append(word)
+        size += len(word) + 1
+        i += 1
+    return " ".join(words)[:chars]
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    latency_ms: wait before the first chunk (time to first token)
+    chunks / chunk_delay_ms: how the answer is streamed
+    response_chars: answer size
+    The answer depends only on the prompt, so repeated runs are comparable.
+    """
+    model_name = "fake-llm"
+
+    def __init__(self, latency_ms: float = 500, chunks: int = 20,
+                 chunk_delay_ms: float = 50, response_chars: int = 2000):
+        self.latency_ms = latency_ms
+        self.chunks = max(1, chunks)
+        self.chunk_delay_ms = chunk_delay_ms
+        self.response_chars = response_chars
+
+    @classmethod
+    def from_env(cls) -> "FakeLLMProvider":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "500")),
+            chunks=int(os.getenv("FAKE_LLM_CHUNKS", "20")),
+            chunk_delay_ms=float(os.getenv("FAKE_LLM_CHUNK_DELAY_MS", "50")),
+            response_chars=int(os.getenv("FAKE_LLM_RESPONSE_CHARS", "2000")),
+        )
+
+    def answer_for(self, prompt: str) -> str:
+        return _fake_text(prompt, self.response_chars)
+
+    def generate(self, prompt: str) -> str:
+        time.sleep((self.latency_ms + self.chunk_delay_ms * (self.chunks - 1)) / 1000)
+        return self.answer_for(prompt)
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        text = self.answer_for(prompt)
+        size = -(-len(text) // self.chunks) or 1
+        time.sleep(self.latency_ms / 1000)
+        for i, start in enumerate(range(0, len(text), size)):
+            if i:
+                time.sleep(self.chunk_delay_ms / 1000)
+            yield text[start:start + size]
+
+
+class FakeTranscriptProvider(TranscriptProvider):
+    """lines of about words_per_line words each, after latency_ms."""
+
+    def __init__(self, latency_ms: float = 200, lines: int = 600, words_per_line: int = 12):
+        self.latency_ms = latency_ms
+        self.lines = lines
+        self.words_per_line = words_per_line
+
+    @classmethod
+    def from_env(cls) -> "FakeTranscriptProvider":
+        return cls(
+            latency_ms=float(os.getenv("FAKE_TRANSCRIPT_LATENCY_MS", "200")),
+            lines=int(os.getenv("FAKE_TRANSCRIPT_LINES", "600")),
+            words_per_line=int(os.getenv("FAKE_TRANSCRIPT_WORDS_PER_LINE", "12")),
+        )
+
+    def fetch(self, video_id: str) -> List[Dict[str, Any]]:
+        time.sleep(self.latency_ms / 1000)
+        chars = self.words_per_line * 8
+        return [
+            {"text": _fake_text(f"{video_id}:{i}", chars), "start": i * 4.0, "duration": 4.0}
+            for i in range(self.lines)
+        ]
+
+
+# ------------ Selection ------------
+def llm_from_env(model_name: str) -> LLMProvider:
+    if os.getenv("LLM_PROVIDER", "gemini") == "fake":
+        return FakeLLMProvider.from_env()
+    return GeminiProvider(model_name)
+
+
+def transcripts_from_env() -> TranscriptProvider:
+    if os.getenv("TRANSCRIPT_PROVIDER", "youtube") == "fake":
+        return FakeTranscriptProvider.from_env()
+    return YouTubeTranscriptProvider()
@@ -0,0 +1,209 @@
+# records.py
+"""
+Compact record types for schedule rows held in worker memory.
+
+The sheet tables arrive as header + list rows; schedule_index keeps whole
+schedules per worker, so rows are turned into __slots__ records once per
+refresh (column positions resolved once, per header) and serialized back
+to the columnar wire format the templates expect (see columnar.py) by a
+single function, to_wire(). Sheet columns outside a record's FIELDS are
+kept, in order, in its extra tuple, and to_wire(header=...) sends them
+back in their sheet positions.
+
+    make = DailyTask.reader(header)        # positions resolved here
+    tasks = [make(row) for row in rows]    # one small object per row
+    payload = to_wire(tasks, completions, monthly_todo, header=header)
+
+Completion is built straight from task_completions cursor rows and also
+answers .get(stage, default), so code written for the old
+{task_id: {stage: 0|1}} dicts keeps working.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Type
+
+import columnar
+
+# Sheet statuses that count as done; reset when there is no local completion
+DONE_STATUSES = {"done", "completed", "finished", "1", "true"}
+
+
+class Completion:
+    """One task_completions row: SELECT task_id, completed, first_read, notes, revision."""
+    __slots__ = ("task_id", "completed", "first_read", "notes", "revision")
+
+    def __init__(self, task_id: str, completed: int = 0, first_read: int = 0,
+                 notes: int = 0, revision: int = 0):
+        self.task_id = task_id
+        self.completed = completed
+        self.first_read = first_read
+        self.notes = notes
+        self.revision = revision
+
+    def get(self, stage: str, default: Any = None) -> Any:
+        return getattr(self, stage, default) if stage in self.__slots__ else default
+
+    def __getitem__(self, stage: str) -> Any:
+        if stage not in self.__slots__:
+            raise KeyError(stage)
+        return getattr(self, stage)
+
+    def __repr__(self) -> str:
+        return (f"Completion({self.task_id!r}, completed={self.completed}, first_read={self.first_read}, "
+                f"notes={self.notes}, revision={self.revision})")
+
+
+# No task_completions row: every stage 0 (shared, read-only)
+NO_COMPLETION = Completion("")
+
+# extra of records whose sheet has no unknown columns (shared)
+NO_EXTRA = ()
+
+
+class _Record:
+    """Base for sheet records: FIELDS pairs slot names with sheet column names."""
+    __slots__ = ()
+    FIELDS: Sequence[tuple] = ()
+    # Low-cardinality columns whose strings are shared between records
+    SHARED: frozenset = frozenset()
+
+    @classmethod
+    def reader(cls, header: List[Any]) -> Callable[[List[Any]], "_Record"]:
+        """
+        Constructor for stored rows laid out as header. Columns the header
+        lacks read as None; columns the record doesn't know go, in header
+        order, into extra (see to_wire).
+        """
+        idxs = [header.index(col) if col in header else None for _, col in cls.FIELDS]
+        extra_idxs = _extra_positions(cls, header)
+        shared = [j for j, (_, col) in enumerate(cls.FIELDS) if col in cls.SHARED]
+        width = max([i for i in idxs if i is not None] + extra_idxs, default=-1) + 1
+        pool: Dict[Any, Any] = {}
+
+        def make(row: List[Any]) -> "_Record":
+            if len(row) >= width:
+                values = [row[i] if i is not None else None for i in idxs]
+                extra = tuple([row[i] for i in extra_idxs]) if extra_idxs else NO_EXTRA
+            else:
+                values = [row[i] if i is not None and i < len(row) else None for i in idxs]
+                extra = tuple([row[i] if i < len(row) else None for i in extra_idxs]) if extra_idxs else NO_EXTRA
+            # One string object per distinct date / status / ... value
+            for j in shared:
+                v = values[j]
+                if type(v) is str:
+                    values[j] = pool.setdefault(v, v)
+            return cls(*values, extra=extra)
+        return make
+
+    def __eq__(self, other: Any) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({args})"
+
+
+def _extra_positions(record_type: Type[_Record], header: List[Any]) -> List[int]:
+    """Positions of the header columns record_type has no field for."""
+    known = {col for _, col in record_type.FIELDS}
+    return [i for i, col in enumerate(header) if col not in known]
+
+
+class DailyTask(_Record):
+    __slots__ = ("id", "monthly_task_id", "week_no", "date", "task_name", "status", "extra")
+    FIELDS = (("id", "id"), ("monthly_task_id", "monthly_task_id"), ("week_no", "week_no"),
+              ("date", "Date"), ("task_name", "task_name"), ("status", "Status"))
+    SHARED = frozenset({"monthly_task_id", "week_no", "Date", "Status"})
+
+    def __init__(self, id, monthly_task_id=None, week_no=None, date=None, task_name=None, status=None,
+                 extra=NO_EXTRA):
+        self.id = id
+        self.monthly_task_id = monthly_task_id
+        self.week_no = week_no
+        self.date = date
+        self.task_name = task_name
+        self.status = status
+        self.extra = extra
+
+    @property
+    def day(self) -> str:
+        """yyyy-mm-dd of Date (as the daily_schedule.date index column)."""
+        return (self.date or "")[:10] if isinstance(self.date, str) else ""
+
+
+class MonthlyTask(_Record):
+    __slots__ = ("id", "goals", "to_do", "month_year", "prep_phase", "status", "extra")
+    FIELDS = (("id", "id"), ("goals", "Goals"), ("to_do", "to_do"),
+              ("month_year", "month_year"), ("prep_phase", "prep_phase"), ("status", "Status"))
+    SHARED = frozenset({"Goals", "month_year", "prep_phase", "Status"})
+
+    def __init__(self, id, goals=None, to_do=None, month_year=None, prep_phase=None, status=None,
+                 extra=NO_EXTRA):
+        self.id = id
+        self.goals = goals
+        self.to_do = to_do
+        self.month_year = month_year
+        self.prep_phase = prep_phase
+        self.status = status
+        self.extra = extra
+
+
+# ------------ Wire format ------------
+def _daily_status(c: Completion) -> str:
+    return "done" if c.get("first_read", 0) == 1 and c.get("notes", 0) == 1 and c.get("revision", 0) == 1 else "Pending"
+
+
+def _monthly_status(task: MonthlyTask, c: Optional[Completion]) -> Any:
+    if c is not None and c.get("completed") == 1:
+        return "done"
+    if c is None and str(task.status).lower().strip() in DONE_STATUSES:
+        return "Pending"
+    return task.status
+
+
+def to_wire(
+    records: Iterable[_Record],
+    completions: Dict[str, Any],
+    monthly_todo: Optional[Dict[Any, Any]] = None,
+    record_type: Type[_Record] = DailyTask,
+    header: Optional[List[Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Columnar payload (columnar.encode format) for DailyTask or MonthlyTask
+    records with local completion status applied, the same table the old
+    header + list rows pipeline produced. header is the sheet header the
+    records were read with: columns go out in its order, extra columns
+    included (default: just the FIELDS columns). For daily tasks,
+    monthly_todo ({monthly id: to_do}) replaces monthly_task_id with a
+    monthly_task column; without it the raw ids are sent.
+    """
+    records = list(records)
+    # Field columns by sheet column name
+    by_col: Dict[Any, List[Any]] = {
+        col: [getattr(t, name) for t in records] for name, col in record_type.FIELDS[:-1]
+    }
+    renamed: Dict[Any, Any] = {}
+    tail: List[tuple] = []
+    if record_type is DailyTask:
+        stages = [completions.get(f"daily_{t.id}", NO_COMPLETION) for t in records]
+        if monthly_todo is not None:
+            renamed["monthly_task_id"] = "monthly_task"
+            by_col["monthly_task_id"] = [
+                monthly_todo.get(t.monthly_task_id, f"[Missing task {t.monthly_task_id}]") for t in records]
+        by_col["Status"] = [_daily_status(c) for c in stages]
+        tail = [(stage, [c.get(stage, 0) for c in stages]) for stage in ("first_read", "notes", "revision")]
+    else:
+        by_col["Status"] = [_monthly_status(t, completions.get(f"monthly_{t.id}")) for t in records]
+
+    if header is None:
+        header = [col for _, col in record_type.FIELDS]
+    names: List[Any] = []
+    columns: List[List[Any]] = []
+    for j, i in enumerate(_extra_positions(record_type, header)):
+        by_col[(None, i)] = [t.extra[j] if j < len(t.extra) else None for t in records]
+    for i, col in enumerate(header):
+        names.append(renamed.get(col, col))
+        columns.append(by_col[col] if col in by_col else by_col[(None, i)])
+    for name, column in tail:
+        names.append(name)
+        columns.append(column)
+    return columnar.encode_columns(names, columns)
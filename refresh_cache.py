@@ -1,14 +1,17 @@
 # refresh_cache.py
 import os
 from dotenv import load_dotenv
+
+# Before the project imports: their settings (ROW_CODEC, ...) come from .env
+load_dotenv()
+
 import db_cache
 
 def main():
-    load_dotenv()
     url = os.getenv("web_app")
     if not url:
         raise RuntimeError("Missing env var: web_app")
-    db_cache.refresh_cache(url)
+    db_cache.refresh_cache(url, source="cli")
     print("Cache refreshed OK")
 
 if __name__ == "__main__":
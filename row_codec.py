@@ -0,0 +1,158 @@
+# row_codec.py
+"""
+Pluggable encoding for the row_data column of the schedule tables.
+
+ROW_CODEC picks how rows are written:
+  json      JSON text, the original format (default; readable with the
+            sqlite3 shell and json_extract)
+  packed    all-string rows (nearly every sheet row) as UTF-8 joined by the
+            ASCII unit separator, decoded by one str.split; other rows
+            are stored as json
+  msgpack   MessagePack (needs the msgpack package, else json is used)
+Append "+zlib" (e.g. packed+zlib) to also compress each row; rows are
+short, so this saves less than it costs to decode - measure with
+bench_db_cache.py --codecs before using it.
+
+Every format is independent of the Python version (rows outlive
+interpreter upgrades, so e.g. marshal is not offered). Reads never depend
+on the setting: JSON rows are stored as TEXT and
+binary rows as BLOBs that start with a one-byte tag, so a database may
+hold a mix (until the next refresh or migrate_row_codec.py rewrites it).
+"""
+import os
+import json
+import zlib
+from typing import Any, Callable, Dict, List, Union
+
+# msgpack is optional; without it ROW_CODEC=msgpack falls back to json
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - depends on host packages
+    msgpack = None
+
+# ------------ Configuration ------------
+def configured() -> str:
+    """
+    ROW_CODEC as set now. Read per call, not at import: entry points load
+    .env after importing db_cache, and a stale default would make the next
+    refresh rewrite every row as json.
+    """
+    return os.getenv("ROW_CODEC", "json").strip().lower()
+
+
+ZLIB_LEVEL = 6
+
+# Leading tag byte of binary rows
+_TAG_JSON = b"j"      # only inside zlib
+_TAG_PACKED = b"s"
+_TAG_MSGPACK = b"p"
+_TAG_ZLIB = b"z"
+
+# Field separator of packed rows (ASCII unit separator)
+_SEP = "\x1f"
+
+Stored = Union[str, bytes]
+
+
+# ------------ Encoding ------------
+def _encode_json(row: List[Any]) -> Stored:
+    return json.dumps(row)
+
+
+def _encode_packed(row: List[Any]) -> Stored:
+    if row and all(type(v) is str and _SEP not in v for v in row):
+        return _TAG_PACKED + _SEP.join(row).encode("utf-8")
+    return _encode_json(row)
+
+
+def _encode_msgpack(row: List[Any]) -> Stored:
+    return _TAG_MSGPACK + msgpack.packb(row, use_bin_type=True)
+
+
+_ENCODERS: Dict[str, Callable[[List[Any]], Stored]] = {
+    "json": _encode_json,
+    "packed": _encode_packed,
+    "msgpack": _encode_msgpack,
+}
+
+# Tags whose rows are already in each codec's canonical form (None = JSON
+# text); anything else is re-encoded by reencoder()
+_TAGS = {
+    "json": {None},
+    "packed": {_TAG_PACKED},
+    "msgpack": {_TAG_MSGPACK},
+}
+
+
+def _resolve(name: str = None) -> str:
+    """Validated codec name, with msgpack -> json when it isn't installed."""
+    name = (name or configured()).lower()
+    base, _, compress = name.partition("+")
+    if base not in _ENCODERS or compress not in ("", "zlib"):
+        raise ValueError(f"Unknown row codec {name!r}; choose from {', '.join(available())}")
+    if base == "msgpack" and msgpack is None:
+        print("ROW_CODEC=msgpack but msgpack is not installed; storing rows as json")
+        base = "json"
+    return f"{base}+{compress}" if compress else base
+
+
+def available() -> List[str]:
+    """Codec names usable on this host (with and without +zlib)."""
+    names = [name for name in _ENCODERS if name != "msgpack" or msgpack is not None]
+    return names + [f"{name}+zlib" for name in names]
+
+
+def encoder(name: str = None) -> Callable[[List[Any]], Stored]:
+    """Row -> stored value for codec name (default: ROW_CODEC)."""
+    base, _, compress = _resolve(name).partition("+")
+    encode = _ENCODERS[base]
+    if not compress:
+        return encode
+
+    def encode_zlib(row: List[Any]) -> Stored:
+        inner = encode(row)
+        if isinstance(inner, str):
+            inner = _TAG_JSON + inner.encode("utf-8")
+        return _TAG_ZLIB + zlib.compress(inner, ZLIB_LEVEL)
+    return encode_zlib
+
+
+# ------------ Decoding ------------
+def _decode_bytes(value: bytes) -> List[Any]:
+    tag = value[:1]
+    if tag == _TAG_PACKED:
+        return str(memoryview(value)[1:], "utf-8").split(_SEP)
+    if tag == _TAG_MSGPACK:
+        if msgpack is None:
+            raise RuntimeError("Row stored as msgpack but msgpack is not installed")
+        return msgpack.unpackb(memoryview(value)[1:], raw=False)
+    if tag == _TAG_ZLIB:
+        return _decode_bytes(zlib.decompress(memoryview(value)[1:]))
+    if tag == _TAG_JSON:
+        return json.loads(value[1:])
+    raise ValueError(f"Unknown row encoding tag {tag!r}")
+
+
+def decode(value: Stored) -> List[Any]:
+    """Stored row_data (any codec) -> row list."""
+    if type(value) is str:
+        return json.loads(value)
+    return _decode_bytes(value)
+
+
+def reencoder(name: str = None) -> Callable[[Stored], Stored]:
+    """
+    Stored value -> the same row as codec name stores it. Values already
+    in that codec are returned as is (zlib rows are always re-encoded).
+    """
+    name = _resolve(name)
+    encode = encoder(name)
+    tags = set() if "+" in name else _TAGS[name]
+
+    def convert(value: Stored) -> Stored:
+        if type(value) is str:
+            return value if None in tags else encode(json.loads(value))
+        if value[:1] in tags:
+            return value
+        return encode(_decode_bytes(value))
+    return convert
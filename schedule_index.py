@@ -0,0 +1,136 @@
+# schedule_index.py
+"""
+Per-worker in-memory index of the schedule for /daily and /schedule.
+
+Built once per refresh: keyed by the updated_at_ist stamp that
+refresh_cache() publishes, so the next request after a refresh (in any
+worker) rebuilds it. Rows are held as compact records (records.py) with
+column positions resolved once, monthly_task_id resolves through a
+{monthly id: to_do} map, and daily tasks are grouped by date so a day is
+one dict lookup plus a slice.
+
+Completion status is not part of the index - it changes on every tick -
+and is applied to the requested rows only, per request.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import columnar
+import db_cache
+import metrics
+import records
+import row_codec
+from records import DailyTask, MonthlyTask
+from timing import phase
+
+
+class ScheduleIndex:
+    """DailyTask records sorted by date, MonthlyTask records, plus lookups."""
+
+    def __init__(self, stamp: str, daily_rows: List[List[Any]], monthly_rows: List[List[Any]]):
+        self.stamp = stamp
+        self.has_daily = bool(daily_rows)
+        self.has_monthly = bool(monthly_rows)
+        self.monthly: List[MonthlyTask] = []
+        self.monthly_todo: Dict[Any, Any] = {}
+        self.daily: List[DailyTask] = []
+        self.by_date: Dict[str, Tuple[int, int]] = {}
+        # Sheet headers, so to_wire sends every column in sheet order
+        self.monthly_header: List[Any] = monthly_rows[0] if monthly_rows else []
+        self.daily_header: List[Any] = daily_rows[0] if daily_rows else []
+
+        if monthly_rows:
+            header = monthly_rows[0]
+            make = MonthlyTask.reader(header)
+            self.monthly = [make(row) for row in monthly_rows[1:]]
+            if "id" in header and "to_do" in header:
+                id_idx, todo_idx = header.index("id"), header.index("to_do")
+                for r in monthly_rows[1:]:
+                    if id_idx < len(r) and todo_idx < len(r):
+                        self.monthly_todo[r[id_idx]] = r[todo_idx]
+
+        if not daily_rows:
+            return
+        if "Date" not in self.daily_header:
+            print(f"schedule_index: daily sheet has no Date column ({self.daily_header}); /daily will be empty")
+        make = DailyTask.reader(self.daily_header)
+        # Stable sort keeps sheet (id) order within a day
+        self.daily = sorted((make(row) for row in daily_rows[1:]), key=lambda t: t.day)
+        start = 0
+        for i in range(1, len(self.daily) + 1):
+            if i == len(self.daily) or self.daily[i].day != self.daily[start].day:
+                self.by_date[self.daily[start].day] = (start, i)
+                start = i
+
+    def day(self, view_date: str) -> List[DailyTask]:
+        """The (shared - do not mutate) DailyTask records for view_date."""
+        start, stop = self.by_date.get(view_date, (0, 0))
+        return self.daily[start:stop]
+
+
+_index: Optional[ScheduleIndex] = None
+
+
+def _decode_rows(sql_table: str, cursor) -> List[List[Any]]:
+    """
+    Decoded rows of one table. A row this host can't decode (e.g. msgpack
+    written elsewhere) is logged and skipped rather than failing every page;
+    the next refresh rewrites it.
+    """
+    rows = []
+    for row_id, value in cursor:
+        try:
+            rows.append(row_codec.decode(value))
+        except Exception as e:
+            print(f"schedule_index: skipping {sql_table} row {row_id}: {e}")
+            metrics.inc("app_row_decode_errors_total", table=sql_table)
+    return rows
+
+
+def _load(stamp: str) -> ScheduleIndex:
+    """Read both sheet tables as stored (no completion merge) and index them."""
+    tables: Dict[str, List[List[Any]]] = {}
+    with db_cache.get_db_connection() as conn:
+        for name, (sql_table, _) in db_cache.TABLES.items():
+            cursor = conn.execute(f"SELECT id, row_data FROM {sql_table} ORDER BY id")
+            tables[name] = _decode_rows(sql_table, cursor)
+    return ScheduleIndex(stamp, tables["daily_OCT"], tables["Monthly"])
+
+
+def get() -> ScheduleIndex:
+    """This worker's index, rebuilt if a refresh happened since it was built."""
+    global _index
+    stamp = db_cache.get_refresh_stamp()
+    if _index is not None and _index.stamp == stamp:
+        metrics.inc("app_cache_lookups_total", cache="schedule_index", result="hit")
+        return _index
+    metrics.inc("app_cache_lookups_total", cache="schedule_index", result="miss")
+    db_cache.init_db()
+    with phase("schedule_index_build"):
+        _index = _load(stamp)
+    return _index
+
+
+def daily_items(view_date: str) -> Dict[str, Any]:
+    """
+    Columnar payload of the daily tasks for view_date with monthly to_do
+    text and local completion status, as the /daily templates expect.
+    """
+    index = get()
+    if not index.has_daily:
+        return columnar.encode([])
+    tasks = index.day(view_date)
+    with phase("db_completions"):
+        completions = db_cache.get_completions([f"daily_{t.id}" for t in tasks]) if tasks else {}
+    return records.to_wire(tasks, completions, index.monthly_todo if index.has_monthly else None,
+                           header=index.daily_header)
+
+
+def monthly_items() -> Dict[str, Any]:
+    """Columnar payload of all monthly tasks with local completion status."""
+    index = get()
+    if not index.has_monthly:
+        return columnar.encode([])
+    with phase("db_completions"):
+        completions = db_cache.get_completions([f"monthly_{t.id}" for t in index.monthly])
+    return records.to_wire(index.monthly, completions, record_type=MonthlyTask,
+                           header=index.monthly_header)
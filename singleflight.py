@@ -0,0 +1,137 @@
+# singleflight.py
+"""
+Cross-process single-flight: when several workers need the same expensive
+result at once, one becomes the leader and computes it; the others wait and
+read the leader's result from wherever it publishes it (llm_cache).
+
+The leader lock is a row in a small SQLite table, so it works across uWSGI
+worker processes without threads.
+"""
+import os
+import time
+import sqlite3
+from typing import Callable, Optional, Tuple, TypeVar
+from contextlib import contextmanager
+
+import db_cache
+
+T = TypeVar("T")
+
+# ------------ Configuration ------------
+LOCK_DB_PATH = os.path.join(db_cache.DATA_DIR, "singleflight.db")
+
+# A lock older than this is considered abandoned (leader crashed)
+LOCK_TTL_SECS = int(os.getenv("SINGLEFLIGHT_LOCK_TTL_SECS", "300"))
+
+# How long a follower waits for the leader before computing itself. A
+# waiting follower ties up its (single-threaded) web worker, so keep this
+# short; wait() and do() read it at call time
+WAIT_SECS = float(os.getenv("SINGLEFLIGHT_WAIT_SECS", "30"))
+
+POLL_SECS = 0.25
+
+# Per-worker counters
+STATS = {"leaders": 0, "followers": 0, "follower_timeouts": 0, "leader_failures": 0}
+
+
+class LeaderFailed(Exception):
+    """The leader finished without publishing a result."""
+
+
+@contextmanager
+def get_connection():
+    conn = None
+    try:
+        conn = sqlite3.connect(LOCK_DB_PATH, timeout=10)
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def init_db():
+    with get_connection() as conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS inflight (
+                key TEXT PRIMARY KEY,
+                owner_pid INTEGER NOT NULL,
+                started_at REAL NOT NULL
+            )
+        """)
+        conn.commit()
+
+
+def acquire(key: str) -> bool:
+    """Try to become the leader for key. Takes over abandoned locks."""
+    init_db()
+    now = time.time()
+    with get_connection() as conn:
+        conn.execute(
+            "DELETE FROM inflight WHERE key = ? AND started_at < ?",
+            (key, now - LOCK_TTL_SECS),
+        )
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO inflight (key, owner_pid, started_at) VALUES (?, ?, ?)",
+            (key, os.getpid(), now),
+        )
+        conn.commit()
+        return cursor.rowcount == 1
+
+
+def release(key: str) -> None:
+    with get_connection() as conn:
+        conn.execute("DELETE FROM inflight WHERE key = ?", (key,))
+        conn.commit()
+
+
+def is_inflight(key: str) -> bool:
+    with get_connection() as conn:
+        return conn.execute(
+            "SELECT 1 FROM inflight WHERE key = ?", (key,)
+        ).fetchone() is not None
+
+
+def wait(key: str, peek: Callable[[], Optional[T]], timeout: Optional[float] = None) -> Optional[T]:
+    """
+    Poll until peek() returns a result or the leader releases the lock.
+    Returns the result, or None on timeout (default WAIT_SECS). Raises
+    LeaderFailed if the leader finished without one.
+    """
+    deadline = time.monotonic() + (WAIT_SECS if timeout is None else timeout)
+    while time.monotonic() < deadline:
+        result = peek()
+        if result is not None:
+            return result
+        if not is_inflight(key):
+            # Leader is gone; one last look in case it published just now
+            result = peek()
+            if result is None:
+                STATS["leader_failures"] += 1
+                raise LeaderFailed("The same request just failed on another worker; try again")
+            return result
+        time.sleep(POLL_SECS)
+    STATS["follower_timeouts"] += 1
+    return None
+
+
+def do(key: str, peek: Callable[[], Optional[T]], compute: Callable[[], T],
+       timeout: Optional[float] = None) -> Tuple[T, bool]:
+    """
+    Return (result, led). Exactly one concurrent caller per key runs
+    compute(), which must publish its result where peek() can see it.
+    Followers raise LeaderFailed if the leader fails, rather than each
+    retrying the failing call in turn.
+    """
+    if acquire(key):
+        STATS["leaders"] += 1
+        try:
+            return compute(), True
+        finally:
+            release(key)
+
+    STATS["followers"] += 1
+    result = wait(key, peek, timeout)
+    if result is not None:
+        return result, False
+    # Leader is stuck; don't keep the user waiting forever
+    return compute(), True
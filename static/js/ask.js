@@ -0,0 +1,65 @@
+// static/js/ask.js — client for the streaming /api/ask/stream endpoint
+//
+//   const ctrl = new AbortController();
+//   await askStream("general", "What is GDP?", {
+//     onToken: (text, full) => { out.textContent = full; },
+//     signal: ctrl.signal,          // ctrl.abort() cancels the upstream call
+//   });
+//
+// Resolves with { text, cached }; rejects on network/server errors.
+(function () {
+  function parseEvent(block) {
+    let event = "message";
+    const data = [];
+    block.split("\n").forEach(line => {
+      if (line.startsWith("event:")) event = line.slice(6).trim();
+      else if (line.startsWith("data:")) data.push(line.slice(5).trim());
+    });
+    return { event, data: data.length ? JSON.parse(data.join("\n")) : null };
+  }
+
+  async function askStream(mode, prompt, opts = {}) {
+    const { onToken = () => {}, signal, cache = true } = opts;
+    const res = await fetch("/api/ask/stream", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", "Accept": "text/event-stream" },
+      body: JSON.stringify({ mode, prompt, cache }),
+      signal,
+    });
+    if (!res.ok) {
+      const err = await res.json().catch(() => ({}));
+      throw new Error(err.error || `HTTP ${res.status}`);
+    }
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let full = "";
+
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let sep;
+      while ((sep = buffer.indexOf("\n\n")) >= 0) {
+        const block = buffer.slice(0, sep);
+        buffer = buffer.slice(sep + 2);
+        if (!block || block.startsWith(":")) continue; // keep-alive comment
+
+        const { event, data } = parseEvent(block);
+        if (event === "chunk") {
+          full += data.text;
+          onToken(data.text, full);
+        } else if (event === "done") {
+          return { text: full, cached: !!data.cached };
+        } else if (event === "error") {
+          throw new Error(data.error);
+        }
+      }
+    }
+    throw new Error("Stream ended unexpectedly");
+  }
+
+  window.askStream = askStream;
+})();
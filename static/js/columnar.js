@@ -0,0 +1,57 @@
+// static/js/columnar.js — decoder for the compact ITEMS payload (see columnar.py)
+// Payload: { n, cols: [...], kind: ["r"|"d"|"i", ...], dict: [...], data: [[col0...], [col1...]] }
+(function () {
+  function isColumnar(payload) {
+    return payload && !Array.isArray(payload) && Array.isArray(payload.cols);
+  }
+
+  // Resolve dictionary-encoded columns once, then read values column-wise
+  function resolveColumns(payload) {
+    const dict = payload.dict || [];
+    const kind = payload.kind || [];
+    return (payload.data || []).map((col, j) =>
+      kind[j] === "d" ? col.map(i => dict[i]) : col
+    );
+  }
+
+  // -> { header: [...], rows: [[...], ...] }
+  function decodeRows(payload) {
+    if (!isColumnar(payload)) {
+      // Legacy array-of-arrays (header first)
+      const items = Array.isArray(payload) ? payload : [];
+      return { header: items[0] || [], rows: items.slice(1) };
+    }
+    const header = payload.cols;
+    const columns = resolveColumns(payload);
+    const n = payload.n || 0;
+    const rows = new Array(n);
+    for (let r = 0; r < n; r++) {
+      const row = new Array(columns.length);
+      for (let j = 0; j < columns.length; j++) row[j] = columns[j][r];
+      rows[r] = row;
+    }
+    return { header, rows };
+  }
+
+  // -> [{ col: value, ... }, ...]
+  function decodeObjects(payload) {
+    if (!isColumnar(payload)) {
+      const items = Array.isArray(payload) ? payload : [];
+      if (!items.length || !Array.isArray(items[0])) return items;
+      const { header, rows } = decodeRows(items);
+      return rows.map(row => Object.fromEntries(header.map((h, i) => [h, row[i]])));
+    }
+    const header = payload.cols;
+    const columns = resolveColumns(payload);
+    const n = payload.n || 0;
+    const out = new Array(n);
+    for (let r = 0; r < n; r++) {
+      const obj = {};
+      for (let j = 0; j < header.length; j++) obj[header[j]] = columns[j][r];
+      out[r] = obj;
+    }
+    return out;
+  }
+
+  window.Columnar = { decodeRows, decodeObjects };
+})();
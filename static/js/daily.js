@@ -2,8 +2,9 @@
 // Row shape: [id, monthly_task_id, week_no, DateISO, task_name, Status]
 
 (function () {
-  const ITEMS = Array.isArray(window.ITEMS) ? window.ITEMS : [];
-  const VIEW_DATE = window.VIEW_DATE || ""; // YYYY-MM-DD
+  let ITEMS = window.ITEMS || []; // columnar payload, see columnar.js
+  let VIEW_DATE = window.VIEW_DATE || ""; // YYYY-MM-DD
+  const TODAY = window.TODAY || VIEW_DATE;
 
   const taskList = document.getElementById("taskList");
   const emptyState = document.getElementById("emptyState");
@@ -17,6 +18,8 @@
   const progressPct = document.getElementById("progressPct");
   const fgPath = document.getElementById("fgPath");
   const winBanner = document.getElementById("winBanner");
+  const viewDateLabel = document.getElementById("viewDateLabel");
+  const navLinks = document.querySelectorAll("a[data-nav]");
 
   const DONE_TOKENS = new Set(["done","completed","finished","1","true","yes","y"]);
 
@@ -26,13 +29,11 @@
     return DONE_TOKENS.has(s);
   };
 
-  function toObjects(rows) {
-    if (!rows.length) return [];
-    const hasHeader = rows[0] && rows[0][0] === "id";
-    const dataRows = hasHeader ? rows.slice(1) : rows;
+  function toObjects(payload) {
+    const { header, rows: dataRows } = window.Columnar.decodeRows(payload);
+    if (!dataRows.length) return [];
     
     // Find indices for three-stage columns
-    const header = rows[0];
     const firstReadIdx = header.indexOf("first_read");
     const notesIdx = header.indexOf("notes");
     const revisionIdx = header.indexOf("revision");
@@ -119,8 +120,8 @@
       });
       
       if (response.ok) {
-        // Reload the page to reflect changes
-        location.reload();
+        // Re-fetch just this day and re-render in place
+        await refreshDay();
       } else {
         alert('Failed to update task. Please try again.');
       }
@@ -153,67 +154,84 @@
     return btn;
   }
 
+  // Task cards keyed by id; a card is rebuilt only when its row changed
+  let cardCache = new Map();
+
+  const cardSignature = (it) =>
+    [it.task_name, it.week_no, it.monthly_task_id, it.first_read, it.notes, it.revision].join("\u0001");
+
   function renderList(source) {
-    taskList.innerHTML = "";
     if (!source.length) {
+      taskList.replaceChildren();
       emptyState.classList.remove("hidden");
       renderStats(source);
       return;
     }
     emptyState.classList.add("hidden");
 
-    source.forEach(it => {
-      const allDone = it.first_read && it.notes && it.revision;
-      const card = document.createElement("div");
-      card.className = "task " + (allDone ? "done" : "pending");
+    const nextCache = new Map();
+    const cards = source.map(it => {
+      const sig = cardSignature(it);
+      const cached = cardCache.get(it.id);
+      const card = cached && cached.sig === sig ? cached.el : createCard(it);
+      nextCache.set(it.id, { sig, el: card });
+      return card;
+    });
+    cardCache = nextCache;
+    taskList.replaceChildren(...cards);
 
-      const left = document.createElement("div");
-      const title = document.createElement("div");
-      title.className = "title";
-      
-      // Add strikethrough if all stages are done
-      if (allDone) {
-        title.style.textDecoration = "line-through";
-        title.style.opacity = "0.7";
-      }
-      title.textContent = it.task_name || "(Untitled Task)";
+    renderStats(source);
+  }
 
-      const meta = document.createElement("div");
-      meta.className = "meta";
-      
-      // Count completed stages
-      const completedStages = (it.first_read ? 1 : 0) + (it.notes ? 1 : 0) + (it.revision ? 1 : 0);
-      const stageText = `${completedStages}/3 stages`;
-      
-      meta.innerHTML = `
-        <span class="badge ${allDone ? "done":"pending"}">${allDone ? "All Done" : stageText}</span>
-        <span class="badge">Week ${it.week_no || "-"}</span>
-        <span class="badge">Goal: ${it.monthly_task_id || "-"}</span>
-      `;
-
-      left.appendChild(title);
-      left.appendChild(meta);
-
-      // Three-stage buttons
-      const right = document.createElement("div");
-      right.className = "stage-buttons-container";
-      
-      const buttonsWrapper = document.createElement("div");
-      buttonsWrapper.className = "stage-buttons";
-      
-      // Create three buttons
-      buttonsWrapper.appendChild(createStageButton('first_read', it.first_read, it.id, 'First Read'));
-      buttonsWrapper.appendChild(createStageButton('notes', it.notes, it.id, 'Notes'));
-      buttonsWrapper.appendChild(createStageButton('revision', it.revision, it.id, 'Revision'));
-      
-      right.appendChild(buttonsWrapper);
+  function createCard(it) {
+    const allDone = it.first_read && it.notes && it.revision;
+    const card = document.createElement("div");
+    card.className = "task " + (allDone ? "done" : "pending");
 
-      card.appendChild(left);
-      card.appendChild(right);
-      taskList.appendChild(card);
-    });
+    const left = document.createElement("div");
+    const title = document.createElement("div");
+    title.className = "title";
+    
+    // Add strikethrough if all stages are done
+    if (allDone) {
+      title.style.textDecoration = "line-through";
+      title.style.opacity = "0.7";
+    }
+    title.textContent = it.task_name || "(Untitled Task)";
 
-    renderStats(source);
+    const meta = document.createElement("div");
+    meta.className = "meta";
+    
+    // Count completed stages
+    const completedStages = (it.first_read ? 1 : 0) + (it.notes ? 1 : 0) + (it.revision ? 1 : 0);
+    const stageText = `${completedStages}/3 stages`;
+    
+    meta.innerHTML = `
+      <span class="badge ${allDone ? "done":"pending"}">${allDone ? "All Done" : stageText}</span>
+      <span class="badge">Week ${it.week_no || "-"}</span>
+      <span class="badge">Goal: ${it.monthly_task_id || "-"}</span>
+    `;
+
+    left.appendChild(title);
+    left.appendChild(meta);
+
+    // Three-stage buttons
+    const right = document.createElement("div");
+    right.className = "stage-buttons-container";
+    
+    const buttonsWrapper = document.createElement("div");
+    buttonsWrapper.className = "stage-buttons";
+    
+    // Create three buttons
+    buttonsWrapper.appendChild(createStageButton('first_read', it.first_read, it.id, 'First Read'));
+    buttonsWrapper.appendChild(createStageButton('notes', it.notes, it.id, 'Notes'));
+    buttonsWrapper.appendChild(createStageButton('revision', it.revision, it.id, 'Revision'));
+    
+    right.appendChild(buttonsWrapper);
+
+    card.appendChild(left);
+    card.appendChild(right);
+    return card;
   }
 
   function render() {
@@ -224,6 +242,112 @@
     clearSearch.classList.toggle("hidden", !searchBox.value.trim());
   }
 
+  // ---------- In-place date navigation ----------
+  // Day payloads from /api/daily, keyed by YYYY-MM-DD: { etag, items }
+  const dayCache = new Map();
+  const inflight = new Map();
+  if (VIEW_DATE) dayCache.set(VIEW_DATE, { etag: null, items: ITEMS });
+
+  function addDays(ymd, n) {
+    const d = new Date(ymd + "T00:00:00Z");
+    d.setUTCDate(d.getUTCDate() + n);
+    return d.toISOString().slice(0, 10);
+  }
+
+  function fetchDay(ymd, force) {
+    if (!force && dayCache.has(ymd)) return Promise.resolve(dayCache.get(ymd));
+    if (inflight.has(ymd)) return inflight.get(ymd);
+
+    const cached = dayCache.get(ymd);
+    const headers = cached && cached.etag ? { "If-None-Match": cached.etag } : {};
+    const p = fetch(`/api/daily?d=${encodeURIComponent(ymd)}`, { headers, cache: "no-store" })
+      .then(async (res) => {
+        // 304: nothing changed for this day, keep what we have
+        if (res.status === 304 && cached) return cached;
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const payload = await res.json();
+        const entry = { etag: res.headers.get("ETag"), items: payload.items || [] };
+        dayCache.set(ymd, entry);
+        return entry;
+      })
+      .finally(() => inflight.delete(ymd));
+    inflight.set(ymd, p);
+    return p;
+  }
+
+  function prefetchNeighbours() {
+    const run = () => {
+      fetchDay(addDays(VIEW_DATE, -1)).catch(() => {});
+      fetchDay(addDays(VIEW_DATE, 1)).catch(() => {});
+    };
+    if ("requestIdleCallback" in window) requestIdleCallback(run, { timeout: 2000 });
+    else setTimeout(run, 300);
+  }
+
+  function updateNav() {
+    const targets = { prev: addDays(VIEW_DATE, -1), next: addDays(VIEW_DATE, 1), today: TODAY };
+    navLinks.forEach(a => { a.href = `/daily?d=${targets[a.dataset.nav]}`; });
+    if (viewDateLabel) viewDateLabel.textContent = VIEW_DATE;
+    document.title = document.title.replace(/\(\d{4}-\d{2}-\d{2}\)/, `(${VIEW_DATE})`);
+  }
+
+  async function showDay(ymd, push) {
+    // Paint a cached day straight away, then revalidate it (If-None-Match):
+    // another tab, device or a cache refresh may have changed it since
+    const cached = dayCache.get(ymd);
+    const revalidate = fetchDay(ymd, true);
+    let entry = cached;
+    if (!entry) {
+      try {
+        entry = await revalidate;
+      } catch (error) {
+        // API unavailable: fall back to a normal page load
+        location.href = `/daily?d=${ymd}`;
+        return;
+      }
+    }
+    ITEMS = entry.items;
+    VIEW_DATE = ymd;
+    if (push) history.pushState({ date: ymd }, "", `/daily?d=${ymd}`);
+    updateNav();
+    render();
+    prefetchNeighbours();
+
+    if (cached) {
+      revalidate.then((fresh) => {
+        // 304 returns the cached entry itself: nothing to redraw
+        if (fresh !== cached && VIEW_DATE === ymd) {
+          ITEMS = fresh.items;
+          render();
+        }
+      }).catch(() => {});
+    }
+  }
+
+  async function refreshDay() {
+    try {
+      const entry = await fetchDay(VIEW_DATE, true);
+      ITEMS = entry.items;
+      render();
+    } catch (error) {
+      location.reload();
+    }
+  }
+
+  navLinks.forEach(a => a.addEventListener("click", (e) => {
+    if (e.metaKey || e.ctrlKey || e.shiftKey || e.button !== 0) return;
+    e.preventDefault();
+    const nav = a.dataset.nav;
+    const target = nav === "today" ? TODAY : addDays(VIEW_DATE, nav === "prev" ? -1 : 1);
+    showDay(target, true);
+  }));
+
+  window.addEventListener("popstate", (e) => {
+    const ymd = (e.state && e.state.date) || window.VIEW_DATE;
+    if (ymd && ymd !== VIEW_DATE) showDay(ymd, false);
+  });
+  if (VIEW_DATE) history.replaceState({ date: VIEW_DATE }, "", location.href);
+
   // events
   statusFilter.addEventListener("change", render);
   searchBox.addEventListener("input", render);
@@ -231,4 +355,5 @@
 
   // first paint
   render();
+  if (VIEW_DATE) prefetchNeighbours();
 })();
@@ -2,14 +2,6 @@
 (() => {
   document.addEventListener('DOMContentLoaded', () => {
     // ---------- Helpers ----------
-    function coerceItems(items) {
-      if (!Array.isArray(items) || items.length === 0) return [];
-      if (Array.isArray(items[0])) {
-        const headers = items[0];
-        return items.slice(1).map(row => Object.fromEntries(headers.map((h,i)=>[h, row[i]])));
-      }
-      return items;
-    }
     const unique = (arr) => [...new Set(arr)];
 
     const MONTHS = ["jan","feb","mar","apr","may","jun","jul","aug","sept","oct","nov","dec"];
@@ -48,8 +40,8 @@
     };
 
     // ---------- Data prep ----------
-    // ITEMS is injected from Jinja into the page (global)
-    const RAW = coerceItems(window.ITEMS || []);
+    // ITEMS is injected from Jinja into the page (global), columnar-encoded
+    const RAW = window.Columnar.decodeObjects(window.ITEMS || []);
     const ALL_GOALS = unique(RAW.map(r=>r.Goals).filter(Boolean));
     const ALL_MONTHS = sortMonthKeys(unique(RAW.map(r=>(r.month_year||"").toLowerCase()).filter(Boolean)));
     const STYLE = makeStyleMap(ALL_GOALS);
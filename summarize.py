@@ -0,0 +1,130 @@
+# summarize.py
+"""
+Map-reduce notes for long YouTube transcripts.
+
+Short transcripts keep the original single-shot prompt. Longer ones are
+split into token-bounded chunks, each chunk is summarised (in turn, or
+concurrently with SUMMARY_WORKERS > 1; cached per chunk in llm_cache), and the chunk notes are folded into the
+final "combine" prompt that the caller sends to the model - so the last
+step can still be streamed.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import llm_cache
+
+# ------------ Configuration ------------
+# Rough token estimate; good enough for sizing chunks without a tokenizer
+CHARS_PER_TOKEN = 4
+
+CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "8000"))
+
+# Threads used for the map step. Default 1 (chunks run in turn) because
+# the PythonAnywhere uWSGI setup runs without threads; ask_worker.py, a
+# plain process, raises it (ASK_WORKER_SUMMARY_WORKERS). Each thread's
+# calls take their own LLM slot (admission.py), so threads beyond
+# LLM_MAX_CONCURRENCY only queue.
+MAX_WORKERS = int(os.getenv("SUMMARY_WORKERS", "1"))
+
+SINGLE_SHOT_PROMPT = "Make detailed notes from this YouTube video transcript: {text}"
+CHUNK_PROMPT = (
+    "This is part {part} of {total} of a YouTube lecture transcript. "
+    "Make detailed notes for this part only, keeping headings and key facts: {text}"
+)
+COMBINE_PROMPT = (
+    "Combine these section notes from one YouTube lecture into a single set of "
+    "detailed, well-structured notes. Remove repetition, keep every key fact.\n\n{text}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chunk_transcript(transcript: List[Dict[str, Any]], max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Group transcript lines into chunks of at most max_tokens (estimated)."""
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for entry in transcript:
+        text = (entry.get("text") or "").strip()
+        if not text:
+            continue
+        tokens = estimate_tokens(text)
+        if current and size + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(text)
+        size += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def _group(texts: List[str], max_tokens: int) -> List[List[str]]:
+    """Pack texts into groups whose combined estimate fits max_tokens."""
+    groups: List[List[str]] = []
+    size = 0
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if not groups or size + tokens > max_tokens:
+            groups.append([])
+            size = 0
+        groups[-1].append(text)
+        size += tokens
+    return groups
+
+
+def _map(prompts: List[str], mode: str, model_name: str,
+         generate: Callable[[str], str], max_workers: int) -> List[str]:
+    """Run generate() over prompts, each cached in llm_cache, preserving order."""
+    def one(prompt: str) -> str:
+        text, _ = llm_cache.get_or_generate(mode, prompt, model_name, lambda: generate(prompt))
+        return text
+
+    if max_workers <= 1 or len(prompts) <= 1:
+        return [one(p) for p in prompts]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as pool:
+        return list(pool.map(one, prompts))
+
+
+def video_notes_query(
+    transcript: List[Dict[str, Any]],
+    generate: Callable[[str], str],
+    model_name: str,
+    max_tokens: int = CHUNK_TOKENS,
+    max_workers: Optional[int] = None,
+) -> str:
+    """
+    Return the final prompt for a notes request on this transcript.
+    Runs the map (and, for very long lectures, intermediate reduce) steps
+    through generate(prompt) -> text, on max_workers threads (default:
+    MAX_WORKERS).
+    """
+    if max_workers is None:
+        max_workers = MAX_WORKERS
+    chunks = chunk_transcript(transcript, max_tokens)
+    if len(chunks) <= 1:
+        return SINGLE_SHOT_PROMPT.format(text=" ".join(chunks))
+
+    total = len(chunks)
+    notes = _map(
+        [CHUNK_PROMPT.format(part=i + 1, total=total, text=c) for i, c in enumerate(chunks)],
+        "video_chunk", model_name, generate, max_workers,
+    )
+
+    # Intermediate reduces until all section notes fit in one prompt
+    groups = _group(notes, max_tokens)
+    while len(groups) > 1:
+        notes = _map(
+            [COMBINE_PROMPT.format(text="\n\n".join(g)) for g in groups],
+            "video_reduce", model_name, generate, max_workers,
+        )
+        regrouped = _group(notes, max_tokens)
+        if len(regrouped) >= len(groups):
+            # Notes are not shrinking; stop and let the final prompt carry them
+            break
+        groups = regrouped
+
+    return COMBINE_PROMPT.format(text="\n\n".join(notes))
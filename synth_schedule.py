@@ -0,0 +1,259 @@
+# synth_schedule.py
+"""
+Synthetic schedules for scale testing.
+
+Builds Monthly and daily_OCT tables in the exact shape the Apps Script web
+app returns (what db_cache.validate_payload expects), over any date span,
+plus a matching task_completions history. The data can be written straight
+into a schedule database, saved as JSON, or served over HTTP as a stand-in
+for the Apps Script endpoint so refresh_cache() runs end to end.
+
+    python synth_schedule.py --daily 50000 --start 2024-01-01 --months 24 --db /tmp/big.db
+    python synth_schedule.py --daily 5000 --serve 8765
+    web_app=http://127.0.0.1:8765/ python refresh_cache.py
+"""
+import os
+import sys
+import json
+import random
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import db_cache
+
+MONTHLY_HEADER = ["id", "Goals", "to_do", "month_year", "prep_phase", "Status"]
+DAILY_HEADER = ["id", "monthly_task_id", "week_no", "Date", "task_name", "Status"]
+
+GOALS = ["GS1", "GS2", "GS3", "GS4", "Essay", "Optional", "CSAT", "Current Affairs"]
+TOPICS = {
+    "GS1": ["Modern History", "Art and Culture", "Indian Society", "World Geography"],
+    "GS2": ["Polity", "Governance", "International Relations", "Social Justice"],
+    "GS3": ["Economy", "Environment", "Science and Tech", "Internal Security"],
+    "GS4": ["Ethics Theory", "Case Studies", "Thinkers", "Attitude and Aptitude"],
+    "Essay": ["Essay Practice", "Essay Structure", "Quotes Bank"],
+    "Optional": ["Optional Paper 1", "Optional Paper 2", "Optional PYQs"],
+    "CSAT": ["Quant", "Reasoning", "Comprehension"],
+    "Current Affairs": ["Monthly Magazine", "Newspaper Notes", "Yojana"],
+}
+ACTIONS = ["Read", "Make notes on", "Revise", "Solve PYQs for", "Summarise", "Practice answers on"]
+
+# How the Date column is written: Apps Script sends UTC ("Z"); some sheets
+# carry explicit offsets.
+DATE_STYLES = ("utc", "offset", "mixed")
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+
+CompletionRow = Tuple[str, str, int, int, int, int, Optional[str], Optional[str]]
+
+
+def _month_key(d: date) -> str:
+    return f"{db_cache._MONTH_KEYS[d.month - 1]}_{d.year}"
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _iso_datetime(day: date, style: str, rng: random.Random) -> str:
+    """IST midnight of day as the sheet would serialise it."""
+    if style == "mixed":
+        style = rng.choice(("utc", "offset"))
+    if style == "offset":
+        return f"{day.isoformat()}T00:00:00+05:30"
+    utc = datetime.combine(day, time()) - IST_OFFSET
+    return utc.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+# ------------ Payload ------------
+def generate(
+    daily_count: int = 1000,
+    start: date = date(2025, 10, 1),
+    months: int = 1,
+    monthly_per_month: int = 12,
+    date_style: str = "utc",
+    status_done: float = 0.2,
+    seed: int = 42,
+) -> Dict[str, List[List[Any]]]:
+    """
+    Payload with monthly_per_month Monthly tasks per month and daily_count
+    daily tasks spread evenly over months months from start. Each daily
+    task points at a Monthly task of its own month.
+    """
+    if date_style not in DATE_STYLES:
+        raise ValueError(f"date_style must be one of {DATE_STYLES}")
+    rng = random.Random(seed)
+    start = start.replace(day=1)
+    end = _add_months(start, months)
+    span_days = (end - start).days
+
+    monthly = [list(MONTHLY_HEADER)]
+    by_month: Dict[str, List[str]] = {}
+    for m in range(months):
+        month_start = _add_months(start, m)
+        key = _month_key(month_start)
+        for _ in range(monthly_per_month):
+            task_id = str(len(monthly))
+            goal = rng.choice(GOALS)
+            monthly.append([
+                task_id,
+                goal,
+                f"{rng.choice(ACTIONS)} {rng.choice(TOPICS[goal])}",
+                key,
+                str(min(3, 1 + m * 3 // max(1, months))),
+                "Done" if rng.random() < status_done else "Pending",
+            ])
+            by_month.setdefault(key, []).append(task_id)
+
+    daily = [list(DAILY_HEADER)]
+    for i in range(daily_count):
+        day = start + timedelta(days=i * span_days // max(1, daily_count))
+        parent = rng.choice(by_month[_month_key(day)]) if monthly_per_month else ""
+        goal = monthly[int(parent)][1] if parent else rng.choice(GOALS)
+        daily.append([
+            str(i + 1),
+            parent,
+            str((day.day - 1) // 7 + 1),
+            _iso_datetime(day, date_style, rng),
+            f"{rng.choice(ACTIONS)} {rng.choice(TOPICS[goal])} - part {rng.randint(1, 12)}",
+            "Done" if rng.random() < status_done else "Pending",
+        ])
+
+    return {"Monthly": monthly, "daily_OCT": daily}
+
+
+# ------------ Completion history ------------
+def completions(
+    payload: Dict[str, List[List[Any]]],
+    density: float = 0.35,
+    as_of: Optional[date] = None,
+    seed: int = 42,
+) -> List[CompletionRow]:
+    """
+    task_completions rows for tasks dated before as_of (default: all).
+    A daily task gets its first read with probability density; notes and
+    revision follow at the same rate, so later stages are rarer, as in real
+    use. Monthly tasks of past months are completed at density.
+    """
+    rng = random.Random(seed)
+    rows: List[CompletionRow] = []
+
+    header, data = payload["daily_OCT"][0], payload["daily_OCT"][1:]
+    id_idx, date_idx = header.index("id"), header.index("Date")
+    for row in data:
+        day = date.fromisoformat(db_cache._to_ist_date_str(row[date_idx]))
+        if as_of and day >= as_of:
+            continue
+        if rng.random() >= density:
+            continue
+        notes = rng.random() < density ** 0.5
+        revision = notes and rng.random() < density ** 0.5
+        done_at = datetime.combine(day, time(rng.randint(6, 22), rng.randint(0, 59)))
+        rows.append((f"daily_{row[id_idx]}", "daily", 0, 1, int(notes), int(revision),
+                     done_at.isoformat() + "+05:30", None))
+
+    header, data = payload["Monthly"][0], payload["Monthly"][1:]
+    id_idx, month_idx = header.index("id"), header.index("month_year")
+    as_of_key = _month_key(as_of) if as_of else None
+    for row in data:
+        if as_of_key and row[month_idx] == as_of_key:
+            continue
+        if rng.random() < density:
+            rows.append((f"monthly_{row[id_idx]}", "monthly", 1, 0, 0, 0,
+                         None, row[month_idx]))
+    return rows
+
+
+# ------------ Seeding ------------
+def write_completions(rows: List[CompletionRow]) -> None:
+    db_cache.init_db()
+    with db_cache.get_db_connection() as conn:
+        conn.executemany("""
+            INSERT OR REPLACE INTO task_completions
+            (task_id, task_type, completed, first_read, notes, revision, completed_at, month_year)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        db_cache._bump_data_version(conn.cursor())
+        conn.commit()
+
+
+def seed_db(payload: Dict[str, List[List[Any]]], completion_rows: List[CompletionRow],
+            db_path: Optional[str] = None) -> str:
+    """Load payload and completions into db_path (default: the app's database)."""
+    if db_path:
+        db_cache.DB_PATH = db_path
+    stamp = db_cache.load_payload(payload)
+    write_completions(completion_rows)
+    return stamp
+
+
+def serve(payload: Dict[str, List[List[Any]]], port: int) -> None:
+    """Answer every GET with payload, like the Apps Script web app."""
+    body = json.dumps(payload).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"[synth] serving {len(payload['daily_OCT']) - 1} daily rows at http://127.0.0.1:{port}/")
+    print(f"[synth] set web_app=http://127.0.0.1:{port}/ and refresh")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic schedule")
+    parser.add_argument("--daily", type=int, default=1000, help="daily rows")
+    parser.add_argument("--start", default="2025-10-01", help="first month (yyyy-mm-dd)")
+    parser.add_argument("--months", type=int, default=1, help="months covered")
+    parser.add_argument("--monthly-per-month", type=int, default=12)
+    parser.add_argument("--date-style", choices=DATE_STYLES, default="utc")
+    parser.add_argument("--density", type=float, default=0.35, help="completion density 0..1")
+    parser.add_argument("--as-of", help="only tasks before this date get completions")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="seed this schedule database (e.g. data_cache/schedule.db)")
+    parser.add_argument("--json", help="write the payload to this file")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="serve the payload over HTTP")
+    args = parser.parse_args()
+
+    payload = generate(
+        daily_count=args.daily,
+        start=date.fromisoformat(args.start),
+        months=args.months,
+        monthly_per_month=args.monthly_per_month,
+        date_style=args.date_style,
+        seed=args.seed,
+    )
+    rows = completions(payload, args.density,
+                       date.fromisoformat(args.as_of) if args.as_of else None, args.seed)
+    print(f"[synth] {len(payload['Monthly']) - 1} monthly, {len(payload['daily_OCT']) - 1} daily, "
+          f"{len(rows)} completions")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(payload, f)
+        print(f"[synth] wrote {args.json}")
+    if args.db:
+        stamp = seed_db(payload, rows, args.db)
+        print(f"[synth] seeded {args.db} at {stamp}")
+    if args.serve:
+        serve(payload, args.serve)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
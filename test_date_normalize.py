@@ -0,0 +1,90 @@
+"""
+Test script for the bulk Date normalizer used by refresh.
+The bulk path (memoized, optionally NumPy-batched) must give exactly what
+_to_ist_date_str gives row by row.
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta, timezone
+sys.path.insert(0, os.path.dirname(__file__))
+
+import db_cache
+
+EDGE_CASES = [
+    "", " 2025-10-01 ", "2025-10-01", "garbage", "2025-02-30T10:00:00Z",
+    "2024-02-29T23:59:59.999Z", "2025-10-01T18:30:00.1Z", "2025-10-01T18:30Z",
+    "1945-12-31T20:00:00Z", "2025-09-30T18:30:00.000Z", "2025-09-30T18:29:59.999999Z",
+    "2025-10-01T00:00:00+05:30", "2025-10-01T23:00:00-07:00", "2025-10-01T10:00:00",
+    "9999-12-31T20:00:00Z", "9999-12-31T10:00:00Z", "9998-12-31T20:00:00Z",
+]
+
+# All valid UTC timestamps, so NumPy takes the whole batch (one bad value
+# above sends everything to the scalar path)
+TOP_OF_RANGE = ["9999-12-31T20:00:00Z", "9999-12-31T10:00:00Z", "9998-12-31T20:00:00Z",
+                "2025-10-01T18:30:00Z"]
+
+
+def _sample(n, seed=7):
+    rng = random.Random(seed)
+    base = datetime(1940, 1, 1, tzinfo=timezone.utc)
+    values = []
+    for _ in range(n):
+        dt = base + timedelta(seconds=rng.randrange(0, 86 * 365 * 86400))
+        values.append(rng.choice([
+            dt.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            dt.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            dt.strftime("%Y-%m-%d"),
+            dt.astimezone(timezone(timedelta(hours=-7))).isoformat(),
+            rng.choice(EDGE_CASES),
+        ]))
+    return values
+
+
+def test_bulk_matches_scalar():
+    """Every value converts exactly as _to_ist_date_str does."""
+    print("\n" + "="*60)
+    print("TEST 1: Bulk normalizer matches the scalar converter")
+    print("="*60)
+    values = _sample(5000) + EDGE_CASES + [None]
+    expected = [db_cache._to_ist_date_str(v) for v in values]
+
+    original = db_cache.NUMPY_MIN_BATCH
+    try:
+        for min_batch in (original, 1):
+            db_cache.NUMPY_MIN_BATCH = min_batch
+            assert db_cache._bulk_to_ist_date_strs(values) == expected
+            assert db_cache._bulk_to_ist_date_strs(TOP_OF_RANGE) == [
+                db_cache._to_ist_date_str(v) for v in TOP_OF_RANGE]
+    finally:
+        db_cache.NUMPY_MIN_BATCH = original
+    print(f"  ✓ {len(values)} values, NumPy {'on' if db_cache._import_numpy() else 'not installed'}")
+
+
+def test_normalize_daily_dates_copy_and_in_place():
+    """Both modes give the same table; only copy=True leaves the input alone."""
+    print("\n" + "="*60)
+    print("TEST 2: _normalize_daily_dates copy / in-place")
+    print("="*60)
+    header = ["id", "monthly_task_id", "week_no", "Date", "task_name", "Status"]
+    values = _sample(200, seed=3)
+    rows = [header] + [[str(i), "1", "1", v, "task", "Pending"] for i, v in enumerate(values)] + [["short"]]
+    expected = [header] + [
+        row[:3] + [db_cache._to_ist_date_str(row[3])] + row[4:] if len(row) > 3 else row
+        for row in rows[1:]
+    ]
+
+    copied = db_cache._normalize_daily_dates(rows)
+    assert copied == expected
+    assert rows[1][3] == values[0]
+
+    assert db_cache._normalize_daily_dates(rows, copy=False) == expected
+    assert rows == expected
+    print("  ✓ Same output; copy=True leaves the payload untouched")
+
+
+if __name__ == "__main__":
+    test_bulk_matches_scalar()
+    test_normalize_daily_dates_copy_and_in_place()
+    print("\n✅ Date normalizer tests PASSED!")
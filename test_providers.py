@@ -0,0 +1,95 @@
+"""
+Test script for the offline LLM / transcript providers.
+Runs /api/ask end to end without network access.
+"""
+
+import sys
+import os
+import uuid
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+import providers
+import llm_cache
+import transcript_cache
+import ask_service
+import admission
+import singleflight
+
+
+def _use_fakes():
+    """Temp databases and fake back ends; returns what _restore() needs."""
+    originals = (llm_cache.LLM_CACHE_DB_PATH, transcript_cache.TRANSCRIPT_DB_PATH,
+                 singleflight.LOCK_DB_PATH, admission.SLOTS_DB_PATH,
+                 ask_service._llm, ask_service._transcripts)
+    tmp_dir = tempfile.mkdtemp()
+    llm_cache.LLM_CACHE_DB_PATH = os.path.join(tmp_dir, "llm_cache.db")
+    transcript_cache.TRANSCRIPT_DB_PATH = os.path.join(tmp_dir, "transcripts.db")
+    singleflight.LOCK_DB_PATH = os.path.join(tmp_dir, "singleflight.db")
+    admission.SLOTS_DB_PATH = os.path.join(tmp_dir, "llm_slots.db")
+    llm_cache.clear_memory()
+    ask_service.set_providers(
+        providers.FakeLLMProvider(latency_ms=0, chunks=5, chunk_delay_ms=0, response_chars=300),
+        providers.FakeTranscriptProvider(latency_ms=0, lines=20),
+    )
+    return originals
+
+
+def _restore(originals):
+    (llm_cache.LLM_CACHE_DB_PATH, transcript_cache.TRANSCRIPT_DB_PATH,
+     singleflight.LOCK_DB_PATH, admission.SLOTS_DB_PATH,
+     ask_service._llm, ask_service._transcripts) = originals
+    llm_cache.clear_memory()
+
+
+def test_fake_llm_deterministic():
+    """Same prompt, same answer; the stream adds up to the whole answer."""
+    print("\n" + "="*60)
+    print("TEST 1: Fake LLM is deterministic and streams in chunks")
+    print("="*60)
+    llm = providers.FakeLLMProvider(latency_ms=0, chunks=5, chunk_delay_ms=0, response_chars=300)
+
+    whole = llm.generate("prompt A")
+    chunks = list(llm.stream("prompt A"))
+    print(f"  {len(whole)} chars, {len(chunks)} chunks")
+    assert whole == llm.generate("prompt A")
+    assert whole != llm.generate("prompt B")
+    assert len(whole) == 300
+    assert len(chunks) == 5 and "".join(chunks) == whole
+    print("\n✅ Fake LLM test PASSED!")
+
+
+def test_fake_transcript_shape():
+    print("\n" + "="*60)
+    print("TEST 2: Fake transcript looks like youtube_transcript_api output")
+    print("="*60)
+    lines = providers.FakeTranscriptProvider(latency_ms=0, lines=7).fetch("vid")
+    print(f"  first line: {lines[0]}")
+    assert len(lines) == 7
+    assert set(lines[0]) == {"text", "start", "duration"}
+    print("\n✅ Fake transcript test PASSED!")
+
+
+def test_answer_offline():
+    """The full ask pipeline works (and caches) on the fakes."""
+    print("\n" + "="*60)
+    print("TEST 3: ask_service.answer() with offline providers")
+    print("="*60)
+    originals = _use_fakes()
+    try:
+        prompt = f"https://www.youtube.com/watch?v={uuid.uuid4().hex[:11]}"
+        text, cached = ask_service.answer("video", prompt)
+        again, cached_again = ask_service.answer("video", prompt)
+        print(f"  cached: {cached} -> {cached_again}")
+        assert text and text == again
+        assert not cached and cached_again
+        assert ask_service.model_name() == "fake-llm"
+    finally:
+        _restore(originals)
+    print("\n✅ Offline answer test PASSED!")
+
+
+if __name__ == "__main__":
+    test_fake_llm_deterministic()
+    test_fake_transcript_shape()
+    test_answer_offline()
@@ -0,0 +1,112 @@
+"""
+Test script for the compact schedule records.
+records.to_wire must send exactly what the header + list rows pipeline
+(_merge_completion_status + columnar.encode) sends.
+"""
+
+import sys
+import os
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+import columnar
+import db_cache
+import records
+import synth_schedule
+
+
+def _fixture():
+    payload = synth_schedule.generate(400, start=date(2025, 10, 1), monthly_per_month=8, status_done=0.5)
+    daily = db_cache._normalize_daily_dates(payload["daily_OCT"])
+    completions = {
+        row[0]: records.Completion(*row)
+        for row in (
+            ("daily_1", 0, 1, 1, 1),
+            ("daily_2", 0, 1, 0, 1),
+            ("daily_5", 0, 0, 0, 1),
+            ("monthly_1", 1, 0, 0, 0),
+            ("monthly_2", 0, 0, 0, 0),
+        )
+    }
+    return payload["Monthly"], daily, completions
+
+
+def test_daily_wire_matches_rows():
+    """DailyTask records serialize like merged + joined list rows."""
+    print("\n" + "="*60)
+    print("TEST 1: Daily records -> columnar payload")
+    print("="*60)
+    monthly, daily, completions = _fixture()
+    todo = {row[0]: row[2] for row in monthly[1:]}
+
+    merged = db_cache._merge_completion_status([list(r) for r in daily], completions, "daily")
+    header = ["monthly_task" if h == "monthly_task_id" else h for h in merged[0]]
+    expected = [header] + [
+        [todo.get(v, f"[Missing task {v}]") if i == 1 else v for i, v in enumerate(row)]
+        for row in merged[1:]
+    ]
+
+    make = records.DailyTask.reader(daily[0])
+    tasks = [make(row) for row in daily[1:]]
+    assert records.to_wire(tasks, completions, todo) == columnar.encode(expected)
+    assert records.to_wire(tasks, completions) == columnar.encode(merged)
+    print(f"  ✓ {len(tasks)} daily tasks, with and without the monthly join")
+
+
+def test_monthly_wire_matches_rows():
+    """MonthlyTask records serialize like merged list rows."""
+    print("\n" + "="*60)
+    print("TEST 2: Monthly records -> columnar payload")
+    print("="*60)
+    monthly, _, completions = _fixture()
+    expected = db_cache._merge_completion_status([list(r) for r in monthly], completions, "monthly")
+
+    make = records.MonthlyTask.reader(monthly[0])
+    tasks = [make(row) for row in monthly[1:]]
+    assert records.to_wire(tasks, completions, record_type=records.MonthlyTask) == columnar.encode(expected)
+    print(f"  ✓ {len(tasks)} monthly tasks")
+
+
+def test_reader_handles_reordered_and_short_rows():
+    """Positions come from the header; missing columns read as None."""
+    print("\n" + "="*60)
+    print("TEST 3: Reader column mapping")
+    print("="*60)
+    make = records.DailyTask.reader(["Date", "id", "extra", "task_name"])
+    task = make(["2025-10-01", "7", "x", "Read"])
+    assert (task.id, task.date, task.task_name, task.status) == ("7", "2025-10-01", "Read", None)
+    assert make(["2025-10-02", "8"]).task_name is None
+    assert task.extra == ("x",) and make(["2025-10-02", "8"]).extra == (None,)
+    assert records.Completion("daily_7", 0, 1, 0, 1).get("revision") == 1
+    print("  ✓ Reordered, extra and short columns handled")
+
+
+def test_extra_columns_kept():
+    """Sheet columns outside FIELDS are sent back in their sheet positions."""
+    print("\n" + "="*60)
+    print("TEST 4: Unknown sheet columns pass through")
+    print("="*60)
+    monthly, daily, completions = _fixture()
+    daily = [row[:2] + ["Topic" if i == 0 else f"t{i}"] + row[2:] + ["Notes" if i == 0 else i]
+             for i, row in enumerate(daily)]
+    monthly = [row[:3] + ["Mentor" if i == 0 else f"m{i}"] + row[3:] for i, row in enumerate(monthly)]
+
+    make = records.DailyTask.reader(daily[0])
+    tasks = [make(row) for row in daily[1:]]
+    expected = db_cache._merge_completion_status([list(r) for r in daily], completions, "daily")
+    assert records.to_wire(tasks, completions, header=daily[0]) == columnar.encode(expected)
+
+    make = records.MonthlyTask.reader(monthly[0])
+    tasks = [make(row) for row in monthly[1:]]
+    expected = db_cache._merge_completion_status([list(r) for r in monthly], completions, "monthly")
+    assert records.to_wire(tasks, completions, record_type=records.MonthlyTask,
+                           header=monthly[0]) == columnar.encode(expected)
+    print("  ✓ Extra daily and monthly columns kept in place")
+
+
+if __name__ == "__main__":
+    test_daily_wire_matches_rows()
+    test_monthly_wire_matches_rows()
+    test_reader_handles_reordered_and_short_rows()
+    test_extra_columns_kept()
+    print("\n✅ Record tests PASSED!")
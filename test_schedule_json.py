@@ -0,0 +1,117 @@
+"""
+Test script for /schedule.json paging.
+Following next_cursor page by page must return exactly the rows of the
+full dump, across the Monthly -> daily_OCT table boundary, and bad limits
+must be rejected. A client reading the stream slowly must not lock
+writers out.
+"""
+
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+from datetime import date
+sys.path.insert(0, os.path.dirname(__file__))
+
+import db_cache
+import metrics
+import synth_schedule
+
+import app as app_module
+
+
+def _client(daily_count=57):
+    tmp_dir = tempfile.mkdtemp()
+    db_cache.DB_PATH = os.path.join(tmp_dir, "schedule.db")
+    metrics.METRICS_DIR = os.path.join(tmp_dir, "metrics")
+    db_cache.load_payload(synth_schedule.generate(daily_count, start=date(2025, 10, 1), monthly_per_month=5))
+    app_module._response_cache.clear()
+    app_module._page_cache.clear()
+    return app_module.app.test_client()
+
+
+def test_cursor_pages_cover_full_dump():
+    """Concatenated pages == full dump, for page sizes that do and don't end on a table."""
+    print("\n" + "="*60)
+    print("TEST 1: Cursor pages across table boundaries")
+    print("="*60)
+    original_path, original_metrics = db_cache.DB_PATH, metrics.METRICS_DIR
+    try:
+        client = _client()
+        full = client.get("/schedule.json").get_json()
+        monthly_rows = len(full["Monthly"]) - 1
+
+        for limit in (1, 7, monthly_rows, monthly_rows + 3, 1000):
+            pages = {name: [] for name in db_cache.TABLES}
+            cursor, count = None, 0
+            while True:
+                url = f"/schedule.json?limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+                page = client.get(url).get_json()
+                for name in db_cache.TABLES:
+                    rows = page.get(name) or []
+                    # Every page repeats the header of the tables it covers
+                    pages[name].extend(rows if not pages[name] else rows[1:])
+                cursor = page["next_cursor"]
+                count += 1
+                if not cursor:
+                    break
+            assert pages == {name: full[name] for name in db_cache.TABLES}, limit
+            print(f"  ✓ limit={limit}: {count} pages")
+    finally:
+        db_cache.DB_PATH, metrics.METRICS_DIR = original_path, original_metrics
+
+
+def test_bad_limit_rejected():
+    print("\n" + "="*60)
+    print("TEST 2: Invalid limit values")
+    print("="*60)
+    original_path, original_metrics = db_cache.DB_PATH, metrics.METRICS_DIR
+    try:
+        client = _client()
+        for bad in ("abc", "0", "-5", "1.5"):
+            assert client.get(f"/schedule.json?limit={bad}").status_code == 400, bad
+        assert client.get("/schedule.json?limit=5000").status_code == 200
+        assert not app_module._response_cache._entries
+        print("  ✓ Non-integer and non-positive limits get 400; pages stay out of the HTML cache")
+    finally:
+        db_cache.DB_PATH, metrics.METRICS_DIR = original_path, original_metrics
+
+
+def test_write_during_stream():
+    """A write succeeds while the full dump is half-read."""
+    print("\n" + "="*60)
+    print("TEST 3: Writes while /schedule.json is streaming")
+    print("="*60)
+    original_path, original_metrics = db_cache.DB_PATH, metrics.METRICS_DIR
+    original_chunk = app_module.STREAM_CHUNK_BYTES
+    try:
+        client = _client(3000)
+        full = client.get("/schedule.json").get_json()
+        app_module.STREAM_CHUNK_BYTES = 1024
+        chunks = app_module._iter_schedule_json(list(db_cache.TABLES), None, {})
+        body = [next(chunks) for _ in range(20)]
+
+        conn = sqlite3.connect(db_cache.DB_PATH, timeout=0.5)
+        try:
+            conn.execute("INSERT OR REPLACE INTO metadata (key, value) VALUES ('stream_test', 'x')")
+            conn.commit()
+        finally:
+            conn.close()
+        assert db_cache.mark_task_stage("daily_5", "daily", "notes", True)
+
+        body.extend(chunks)
+        streamed = json.loads(b"".join(body))
+        assert streamed["Monthly"] == full["Monthly"]
+        assert len(streamed["daily_OCT"]) == len(full["daily_OCT"])
+        print(f"  ✓ Writes went through after {len(body[:20])} of {len(body)} chunks")
+    finally:
+        app_module.STREAM_CHUNK_BYTES = original_chunk
+        db_cache.DB_PATH, metrics.METRICS_DIR = original_path, original_metrics
+
+
+if __name__ == "__main__":
+    test_cursor_pages_cover_full_dump()
+    test_bad_limit_rejected()
+    test_write_during_stream()
+    print("\n✅ /schedule.json paging tests PASSED!")
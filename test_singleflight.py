@@ -0,0 +1,134 @@
+"""
+Test script for cross-process single-flight and the LLM cache peek.
+Covers leader acquire/release, taking over abandoned locks, follower
+timeouts and leader failures, and that followers' polling never writes to
+the LLM cache.
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(__file__))
+
+import llm_cache
+import singleflight
+
+
+def _use_temp_dbs():
+    """Point both modules at throwaway files; returns the paths to restore."""
+    originals = (singleflight.LOCK_DB_PATH, llm_cache.LLM_CACHE_DB_PATH)
+    tmp_dir = tempfile.mkdtemp()
+    singleflight.LOCK_DB_PATH = os.path.join(tmp_dir, "singleflight.db")
+    llm_cache.LLM_CACHE_DB_PATH = os.path.join(tmp_dir, "llm_cache.db")
+    llm_cache.clear_memory()
+    return originals
+
+
+def _restore(originals):
+    singleflight.LOCK_DB_PATH, llm_cache.LLM_CACHE_DB_PATH = originals
+    llm_cache.clear_memory()
+
+
+def _hold_lock(key, started_at):
+    """Lock key as some other worker would have."""
+    singleflight.init_db()
+    with singleflight.get_connection() as conn:
+        conn.execute("INSERT OR REPLACE INTO inflight (key, owner_pid, started_at) VALUES (?, ?, ?)",
+                     (key, -1, started_at))
+        conn.commit()
+
+
+def test_acquire_and_steal():
+    """One leader per key; abandoned locks are taken over."""
+    print("\n" + "="*60)
+    print("TEST 1: Leader lock acquire / release / takeover")
+    print("="*60)
+    originals = _use_temp_dbs()
+    try:
+        assert singleflight.acquire("k")
+        assert not singleflight.acquire("k")
+        assert singleflight.is_inflight("k")
+        singleflight.release("k")
+        assert not singleflight.is_inflight("k")
+        assert singleflight.acquire("k")
+
+        _hold_lock("stale", time.time() - singleflight.LOCK_TTL_SECS - 1)
+        assert singleflight.acquire("stale")
+        _hold_lock("fresh", time.time())
+        assert not singleflight.acquire("fresh")
+        print("  ✓ Second caller follows; abandoned lock taken over, live one kept")
+    finally:
+        _restore(originals)
+
+
+def test_follower_paths():
+    """Followers get the leader's result or its failure, or compute themselves on timeout."""
+    print("\n" + "="*60)
+    print("TEST 2: Follower result, leader failed, and timeout")
+    print("="*60)
+    originals = _use_temp_dbs()
+    try:
+        computed = []
+
+        def compute():
+            computed.append(1)
+            return "mine"
+
+        _hold_lock("busy", time.time())
+        assert singleflight.do("busy", lambda: "leader's", compute) == ("leader's", False)
+
+        timeouts = singleflight.STATS["follower_timeouts"]
+        followers = singleflight.STATS["followers"]
+        assert singleflight.wait("busy", lambda: None, timeout=0.3) is None
+        assert singleflight.STATS["follower_timeouts"] == timeouts + 1
+        assert singleflight.do("busy", lambda: None, compute, timeout=0.3) == ("mine", True)
+        assert singleflight.STATS["followers"] == followers + 1
+        assert len(computed) == 1
+
+        # Leader gives up without publishing: followers report it, not retry it
+        singleflight.release("busy")
+        for follow in (lambda: singleflight.wait("busy", lambda: None, timeout=5),
+                       lambda: singleflight.do("busy", lambda: None, compute, timeout=5)):
+            _hold_lock("busy", time.time())
+            threading.Timer(0.3, singleflight.release, ("busy",)).start()
+            try:
+                follow()
+                assert False, "expected LeaderFailed"
+            except singleflight.LeaderFailed:
+                pass
+        assert len(computed) == 1
+        print("  ✓ Shared result, stuck leader and failed leader handled")
+    finally:
+        _restore(originals)
+
+
+def test_peek_is_read_only():
+    """peek() finds published answers without writing to the cache DB."""
+    print("\n" + "="*60)
+    print("TEST 3: llm_cache.peek() does not write")
+    print("="*60)
+    originals = _use_temp_dbs()
+    try:
+        assert llm_cache.peek("missing") is None
+
+        llm_cache.put("key", "answer")
+        llm_cache.clear_memory()
+        with llm_cache.get_connection() as conn:
+            before = conn.execute("SELECT last_access FROM llm_responses WHERE key = 'key'").fetchone()[0]
+        time.sleep(0.01)
+        assert llm_cache.peek("key") == "answer"
+        with llm_cache.get_connection() as conn:
+            after = conn.execute("SELECT last_access FROM llm_responses WHERE key = 'key'").fetchone()[0]
+        assert after == before
+        print("  ✓ Published answer seen, last_access untouched")
+    finally:
+        _restore(originals)
+
+
+if __name__ == "__main__":
+    test_acquire_and_steal()
+    test_follower_paths()
+    test_peek_is_read_only()
+    print("\n✅ Single-flight tests PASSED!")
@@ -0,0 +1,101 @@
+"""
+Test script for the persistent YouTube transcript cache.
+Uses a throwaway database so the real data_cache is untouched.
+"""
+
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(__file__))
+
+import transcript_cache
+
+SAMPLE = [{"text": "hello world", "start": 0.0, "duration": 1.5},
+          {"text": "second line", "start": 1.5, "duration": 2.0}]
+
+
+def _use_temp_db():
+    """Point the cache at a throwaway file; returns the path to restore."""
+    original_path = transcript_cache.TRANSCRIPT_DB_PATH
+    tmp_dir = tempfile.mkdtemp()
+    transcript_cache.TRANSCRIPT_DB_PATH = os.path.join(tmp_dir, "transcripts.db")
+    return original_path
+
+
+def test_fetch_once():
+    """A second lookup for the same video must not call the fetcher."""
+    print("\n" + "="*60)
+    print("TEST 1: Fetch once, then serve from cache")
+    print("="*60)
+    original_path = _use_temp_db()
+    try:
+        calls = []
+        def fetch(video_id):
+            calls.append(video_id)
+            return SAMPLE
+
+        first = transcript_cache.get_or_fetch("abc123", fetch)
+        second = transcript_cache.get_or_fetch("abc123", fetch)
+        print(f"  fetch calls: {calls}")
+        assert first == SAMPLE and second == SAMPLE
+        assert calls == ["abc123"]
+    finally:
+        transcript_cache.TRANSCRIPT_DB_PATH = original_path
+    print("\n✅ Fetch-once test PASSED!")
+
+
+def test_ttl_expiry():
+    """Entries older than TTL_SECS are treated as missing."""
+    print("\n" + "="*60)
+    print("TEST 2: TTL expiry")
+    print("="*60)
+    original_path = _use_temp_db()
+    try:
+        transcript_cache.put("old_video", SAMPLE)
+        with transcript_cache.get_connection() as conn:
+            conn.execute("UPDATE transcripts SET fetched_at = fetched_at - ?",
+                         (transcript_cache.TTL_SECS + 1,))
+            conn.commit()
+
+        assert transcript_cache.get("old_video") is None
+    finally:
+        transcript_cache.TRANSCRIPT_DB_PATH = original_path
+    print("  ✓ expired entry ignored")
+    print("\n✅ TTL test PASSED!")
+
+
+def test_size_eviction():
+    """Least recently used entries are evicted once MAX_BYTES is exceeded."""
+    print("\n" + "="*60)
+    print("TEST 3: Size-based eviction")
+    print("="*60)
+    original_path = _use_temp_db()
+    original = transcript_cache.MAX_BYTES
+    try:
+        one_size = len(transcript_cache._encode(SAMPLE))
+        transcript_cache.MAX_BYTES = one_size * 2
+        transcript_cache.put("v1", SAMPLE)
+        transcript_cache.put("v2", SAMPLE)
+        transcript_cache.get("v1")  # v2 is now least recently used
+        transcript_cache.put("v3", SAMPLE)
+
+        stats = transcript_cache.get_stats()
+        print(f"  stats: {stats}")
+        assert stats["entries"] == 2
+        assert transcript_cache.get("v2") is None
+        assert transcript_cache.get("v1") == SAMPLE
+    finally:
+        transcript_cache.MAX_BYTES = original
+        transcript_cache.TRANSCRIPT_DB_PATH = original_path
+    print("\n✅ Eviction test PASSED!")
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test_func in (test_fetch_once, test_ttl_expiry, test_size_eviction):
+        try:
+            test_func()
+        except Exception as e:
+            print(f"\n✗ TEST FAILED: {test_func.__name__}: {e!r}")
+            failed += 1
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,55 @@
+# timing.py
+"""
+Named phase timings for the current request.
+
+app.py starts a recording per request and turns it into a Server-Timing
+header (visible in browser devtools) and, for slow requests, a structured
+log line. Code anywhere (db_cache, app) wraps work in `with phase("name")`;
+outside a request the phases cost one context-variable lookup and are not
+recorded.
+"""
+import time
+from contextvars import ContextVar
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# [(name, ms)] for the request running in this context, or None
+_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("timing_phases", default=None)
+
+
+def start() -> None:
+    _phases.set([])
+
+
+def stop() -> List[Tuple[str, float]]:
+    phases = _phases.get() or []
+    _phases.set(None)
+    return phases
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    phases = _phases.get()
+    if phases is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        phases.append((name, (time.perf_counter() - t0) * 1000))
+
+
+def summarize(phases: List[Tuple[str, float]]) -> Dict[str, float]:
+    """Sum repeated phases, keeping first-seen order."""
+    totals: Dict[str, float] = {}
+    for name, ms in phases:
+        totals[name] = totals.get(name, 0.0) + ms
+    return {name: round(ms, 2) for name, ms in totals.items()}
+
+
+def server_timing(totals: Dict[str, float], total_ms: float) -> str:
+    """Server-Timing header value, e.g. 'db_read;dur=1.2, render;dur=3.4, total;dur=5.0'."""
+    parts = [f"{name};dur={ms}" for name, ms in totals.items()]
+    parts.append(f"total;dur={round(total_ms, 2)}")
+    return ", ".join(parts)
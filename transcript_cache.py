@@ -0,0 +1,157 @@
+# transcript_cache.py
+import os
+import json
+import time
+import zlib
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional
+from contextlib import contextmanager
+
+import db_cache
+import metrics
+
+# ------------ Configuration ------------
+# Separate file next to schedule.db so transcript writes never contend
+# with schedule reads
+TRANSCRIPT_DB_PATH = os.path.join(db_cache.DATA_DIR, "transcripts.db")
+
+# Entries older than this are refetched
+TTL_SECS = int(os.getenv("TRANSCRIPT_TTL_DAYS", "30")) * 24 * 3600
+
+# Total compressed size kept on disk; least recently used entries go first
+MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MB", "50")) * 1024 * 1024
+
+ZLIB_LEVEL = 6
+
+Transcript = List[Dict[str, Any]]
+
+
+# ------------ Database Setup ------------
+@contextmanager
+def get_connection():
+    """Context manager for transcript database connections."""
+    conn = None
+    try:
+        conn = sqlite3.connect(TRANSCRIPT_DB_PATH, timeout=10)
+        yield conn
+    finally:
+        if conn:
+            conn.close()
+
+
+def init_db():
+    """Create the transcripts table if needed."""
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                video_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_transcripts_access
+            ON transcripts(last_access)
+        """)
+        conn.commit()
+
+
+# ------------ Encoding ------------
+def _encode(transcript: Transcript) -> bytes:
+    return zlib.compress(json.dumps(transcript, separators=(",", ":")).encode("utf-8"), ZLIB_LEVEL)
+
+
+def _decode(blob: bytes) -> Transcript:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+# ------------ Core Logic ------------
+def get(video_id: str) -> Optional[Transcript]:
+    """Return the cached transcript for video_id, or None if missing/expired."""
+    init_db()
+    now = time.time()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT data, fetched_at FROM transcripts WHERE video_id = ?",
+            (video_id,),
+        )
+        row = cursor.fetchone()
+        if row is None or now - row[1] > TTL_SECS:
+            return None
+        cursor.execute(
+            "UPDATE transcripts SET last_access = ? WHERE video_id = ?",
+            (now, video_id),
+        )
+        conn.commit()
+    return _decode(row[0])
+
+
+def put(video_id: str, transcript: Transcript) -> None:
+    """Store a transcript and evict expired / least recently used entries."""
+    init_db()
+    blob = _encode(transcript)
+    now = time.time()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT OR REPLACE INTO transcripts (video_id, data, size, fetched_at, last_access)
+            VALUES (?, ?, ?, ?, ?)
+        """, (video_id, blob, len(blob), now, now))
+        _evict(cursor, now)
+        conn.commit()
+
+
+def _evict(cursor: sqlite3.Cursor, now: float) -> None:
+    """Drop expired rows, then LRU rows until the cache fits in MAX_BYTES."""
+    cursor.execute("DELETE FROM transcripts WHERE fetched_at < ?", (now - TTL_SECS,))
+
+    cursor.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts")
+    total = cursor.fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+
+    cursor.execute("SELECT video_id, size FROM transcripts ORDER BY last_access")
+    victims = []
+    for video_id, size in cursor.fetchall():
+        if total <= MAX_BYTES:
+            break
+        victims.append((video_id,))
+        total -= size
+    cursor.executemany("DELETE FROM transcripts WHERE video_id = ?", victims)
+
+
+def get_or_fetch(video_id: str, fetch: Callable[[str], Transcript]) -> Transcript:
+    """
+    Return the transcript for video_id from the cache, calling fetch(video_id)
+    and storing the result on a miss. Cache errors never block the fetch.
+    """
+    try:
+        cached = get(video_id)
+        if cached is not None:
+            metrics.inc("app_cache_lookups_total", cache="transcript", result="hit")
+            return cached
+    except Exception as e:
+        print(f"Error reading transcript cache: {e}")
+
+    metrics.inc("app_cache_lookups_total", cache="transcript", result="miss")
+    transcript = fetch(video_id)
+
+    try:
+        put(video_id, transcript)
+    except Exception as e:
+        print(f"Error writing transcript cache: {e}")
+    return transcript
+
+
+def get_stats() -> Dict[str, int]:
+    """Entry count and total compressed bytes."""
+    init_db()
+    with get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM transcripts")
+        entries, size = cursor.fetchone()
+    return {"entries": entries, "bytes": size}